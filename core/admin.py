@@ -11,6 +11,10 @@ from core.models import (
     Teacher,
     Subject,
     ChatSettings,
+    FeedbackJob,
+    ResendJob,
+    ItemStatistics,
+    QuestionnaireStatistics,
 )
 
 
@@ -29,7 +33,15 @@ class StudentAdmin(admin.ModelAdmin):
 
 @admin.register(Questionnaire)
 class QuestionnaireAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "content", "external_id", "subject", "created_at")
+    list_display = (
+        "id",
+        "title",
+        "content",
+        "external_id",
+        "version",
+        "subject",
+        "created_at",
+    )
     search_fields = ("title", "external_id")
     list_filter = ("created_at",)
     filter_horizontal = ("students",)
@@ -139,6 +151,11 @@ class ChatSettingsAdmin(admin.ModelAdmin):
         "top_p",
         "frequency_penalty",
         "presence_penalty",
+        "max_concurrent_requests",
+        "batch_prompts",
+        "batch_size",
+        "requests_per_minute",
+        "tokens_per_minute",
         "created_at",
     )
     search_fields = (
@@ -177,3 +194,57 @@ class SubjectAdmin(admin.ModelAdmin):
         "students",
         "teachers",
     )
+
+
+@admin.register(FeedbackJob)
+class FeedbackJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "stage",
+        "student_email",
+        "get_truncated_error",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "resend_job",
+    )
+    search_fields = ("id", "student_email", "error")
+    list_filter = ("stage", "created_at")
+
+    def get_truncated_error(self, obj):
+        return truncate_text(obj.error, max_length=40)
+
+    get_truncated_error.short_description = "Error"
+
+
+@admin.register(ResendJob)
+class ResendJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "questionnaire", "created_at", "updated_at")
+    search_fields = ("id",)
+    list_filter = ("created_at",)
+
+
+@admin.register(ItemStatistics)
+class ItemStatisticsAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "item",
+        "correct_count",
+        "partially_correct_count",
+        "incorrect_count",
+        "updated_at",
+        "questionnaire",
+    )
+    list_filter = ("questionnaire",)
+
+
+@admin.register(QuestionnaireStatistics)
+class QuestionnaireStatisticsAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "questionnaire",
+        "student_count",
+        "score_sum",
+        "histogram",
+        "updated_at",
+    )
@@ -0,0 +1,267 @@
+from collections import OrderedDict
+from threading import Lock
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple, Union
+from django.conf import settings
+from django.core.cache import cache
+from .utils import normalize_answers
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRUCache:
+    def __init__(self, max_entries: int, ttl: int) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CountedCache:
+    key_prefix = ""
+    counter_names: Tuple[str, ...] = ()
+
+    def __init__(self) -> None:
+        self.counters = {name: 0 for name in self.counter_names}
+        self._counters_lock = Lock()
+
+    def counter_stats(self) -> Dict[str, int]:
+        shared_counters = {}
+        try:
+            shared_counters = cache.get_many(
+                [self._counter_key(name) for name in self.counter_names]
+            )
+        except Exception as e:
+            logger.warning("Error reading %s cache stats: %s", self.key_prefix, e)
+
+        stats = {}
+        for name in self.counter_names:
+            stats[f"worker_{name}"] = self.counters[name]
+            stats[name] = shared_counters.get(self._counter_key(name), 0)
+
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            self.counters[name] += 1
+
+        counter_key = self._counter_key(name)
+        try:
+            cache.add(counter_key, 0, timeout=None)
+            cache.incr(counter_key)
+        except Exception:
+            pass
+
+    def _counter_key(self, name: str) -> str:
+        return f"{self.key_prefix}:stats:{name}"
+
+
+class FeedbackCache(CountedCache):
+    key_prefix = "feedback"
+    counter_names = ("local_hits", "shared_hits", "misses")
+
+    def __init__(self, max_entries: int, ttl: int) -> None:
+        super().__init__()
+        self.ttl = ttl
+        self.local = LocalLRUCache(max_entries, ttl)
+
+    def make_key(
+        self, item_id: str, answers: List[str], model: str, prompt: str
+    ) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        answers_hash = hashlib.sha256(
+            json.dumps(normalize_answers(answers), ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return f"{self.key_prefix}:{item_id}:{answers_hash}:{model}:{prompt_hash}"
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            logger.warning("Error reading feedback cache: %s", e)
+            value = None
+
+        if value is None:
+            self._count("misses")
+            return None
+
+        value = tuple(value)
+        self.local.set(key, value)
+        self._count("shared_hits")
+        return value
+
+    def set(self, key: str, explanation: str, improve_suggestions: str) -> None:
+        value = (explanation, improve_suggestions)
+        self.local.set(key, value)
+        try:
+            cache.set(key, value, timeout=self.ttl)
+        except Exception as e:
+            logger.warning("Error writing feedback cache: %s", e)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        try:
+            cache.delete(key)
+        except Exception as e:
+            logger.warning("Error deleting feedback cache: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        return {"local_entries": len(self.local), **self.counter_stats()}
+
+
+class PDFCache(CountedCache):
+    key_prefix = "pdf"
+    counter_names = ("hits", "misses", "evictions")
+    file_extension = ".pdf"
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._evict_lock = Lock()
+
+    def make_key(self, html_string: str, stylesheet_hash: str) -> str:
+        return hashlib.sha256(
+            f"{stylesheet_hash}:{html_string}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as pdf_file:
+                pdf = pdf_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except OSError as e:
+            logger.warning("Error reading PDF cache: %s", e)
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return pdf
+
+    def set(self, key: str, pdf: bytes) -> None:
+        if len(pdf) > self.max_bytes:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as pdf_file:
+                pdf_file.write(pdf)
+            os.replace(pdf_file.name, self._path(key))
+            self.evict()
+        except OSError as e:
+            logger.warning("Error writing PDF cache: %s", e)
+
+    def evict(self) -> int:
+        with self._evict_lock:
+            entries = self._entries()
+            size = sum(entry_size for _, _, entry_size in entries)
+
+            evicted = 0
+            for path, _, entry_size in sorted(entries, key=itemgetter(1)):
+                if size <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+                size -= entry_size
+                evicted += 1
+                self._count("evictions")
+
+        return evicted
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        entries = self._entries()
+        stats = {
+            "entries": len(entries),
+            "size_bytes": sum(entry_size for _, _, entry_size in entries),
+            "max_bytes": self.max_bytes,
+            **self.counter_stats(),
+        }
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+
+        return stats
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        try:
+            with os.scandir(self.directory) as directory_entries:
+                for entry in directory_entries:
+                    if not entry.name.endswith(self.file_extension):
+                        continue
+
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        except FileNotFoundError:
+            pass
+
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.file_extension}")
+
+
+feedback_cache = FeedbackCache(
+    max_entries=settings.FEEDBACK_CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.FEEDBACK_CACHE_TTL,
+)
+pdf_cache = PDFCache(
+    directory=settings.PDF_CACHE_DIR,
+    max_bytes=settings.PDF_CACHE_MAX_BYTES,
+)
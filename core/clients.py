@@ -0,0 +1,51 @@
+from threading import Lock
+from typing import Dict, Tuple
+from django.conf import settings
+from openai import OpenAI
+import httpx
+
+_openai_clients: Dict[str, Tuple[tuple, OpenAI]] = {}
+_openai_clients_lock = Lock()
+
+
+def get_openai_client(chat_settings) -> OpenAI:
+    chat_settings_id = str(chat_settings.id)
+    version = (chat_settings.openai_api_key, chat_settings.updated_at)
+
+    with _openai_clients_lock:
+        client_version, client = _openai_clients.get(chat_settings_id, (None, None))
+        if client is not None and client_version == version:
+            return client
+
+        if client is not None:
+            client.close()
+
+        client = create_openai_client(chat_settings.openai_api_key)
+        _openai_clients[chat_settings_id] = (version, client)
+
+        return client
+
+
+def create_openai_client(api_key: str) -> OpenAI:
+    return OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        timeout=httpx.Timeout(
+            settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT
+        ),
+        http_client=httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+        ),
+    )
+
+
+def invalidate_openai_client(chat_settings_id) -> None:
+    with _openai_clients_lock:
+        _, client = _openai_clients.pop(str(chat_settings_id), (None, None))
+
+    if client is not None:
+        client.close()
@@ -0,0 +1,53 @@
+from typing import FrozenSet, List, Union
+import re
+import unicodedata
+
+
+def normalize_text(text: Union[str, List[str]]) -> str:
+    if isinstance(text, list):
+        text = " ".join(text)
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[^\w\s]", " ", text.casefold())
+
+    return " ".join(text.split())
+
+
+def shingle(text: Union[str, List[str]], size: int = 4) -> FrozenSet[str]:
+    normalized_text = normalize_text(text)
+
+    if len(normalized_text) <= size:
+        return frozenset([normalized_text])
+
+    return frozenset(
+        normalized_text[index : index + size]
+        for index in range(len(normalized_text) - size + 1)
+    )
+
+
+def jaccard_similarity(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    if not first and not second:
+        return 1.0
+
+    return len(first & second) / len(first | second)
+
+
+def cluster_texts(
+    texts: List[Union[str, List[str]]], threshold: float
+) -> List[List[int]]:
+    clusters: List[List[int]] = []
+    representatives: List[FrozenSet[str]] = []
+
+    for index, text in enumerate(texts):
+        shingles = shingle(text)
+
+        for cluster, representative in zip(clusters, representatives):
+            if jaccard_similarity(shingles, representative) >= threshold:
+                cluster.append(index)
+                break
+        else:
+            clusters.append([index])
+            representatives.append(shingles)
+
+    return clusters
@@ -1,2 +1,8 @@
 class FeedbackGenerationException(Exception):
     pass
+
+
+class FeedbackPendingException(Exception):
+    def __init__(self, pending_count: int, reason: str) -> None:
+        super().__init__(f"{pending_count} feedback items pending: {reason}")
+        self.pending_count = pending_count
@@ -0,0 +1,18 @@
+from typing import List, Union
+import hashlib
+import json
+
+
+def hash_question(question: str) -> str:
+    normalized_question = " ".join(question.split())
+
+    return hashlib.sha256(normalized_question.encode("utf-8")).hexdigest()
+
+
+def hash_answer_text(text: Union[str, List[str]]) -> str:
+    if isinstance(text, list):
+        text = sorted(text)
+
+    return hashlib.sha256(
+        json.dumps(text, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
@@ -0,0 +1,89 @@
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+import hashlib
+import json
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+idempotency_key_parameter = openapi.Parameter(
+    IDEMPOTENCY_KEY_HEADER,
+    openapi.IN_HEADER,
+    description="Chave para evitar o processamento duplicado de uma mesma requisição",
+    type=openapi.TYPE_STRING,
+    required=False,
+)
+
+
+def idempotent(view_method):
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key:
+            return view_method(self, request, *args, **kwargs)
+
+        cache_key = _cache_key(self, request, idempotency_key)
+        fingerprint = _fingerprint(request.data)
+
+        stored_response = cache.get(cache_key)
+        if stored_response is not None:
+            return _replay(stored_response, fingerprint)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_TTL):
+            return Response(
+                {
+                    "error_message": "A request with this Idempotency-Key is already in progress."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+
+            if status.is_success(response.status_code):
+                cache.set(
+                    cache_key,
+                    {
+                        "fingerprint": fingerprint,
+                        "status": response.status_code,
+                        "data": response.data,
+                    },
+                    timeout=settings.IDEMPOTENCY_KEY_TTL,
+                )
+
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
+
+
+def _replay(stored_response: dict, fingerprint: str) -> Response:
+    if stored_response["fingerprint"] != fingerprint:
+        return Response(
+            {
+                "error_message": "Idempotency-Key was already used with a different payload."
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    return Response(
+        stored_response["data"],
+        status=stored_response["status"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _cache_key(view, request, idempotency_key: str) -> str:
+    key_hash = hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()
+    return f"idempotency:{type(view).__name__}:{request.user.pk}:{key_hash}"
+
+
+def _fingerprint(data) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
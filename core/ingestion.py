@@ -0,0 +1,381 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from django.conf import settings
+from django.db import transaction
+from .models import (
+    Answer,
+    ChatSettings,
+    FeedbackJob,
+    Item,
+    Questionnaire,
+    Result,
+    Student,
+    Subject,
+    Teacher,
+    schedule_regrade,
+)
+from .cache import LocalLRUCache
+from .exceptions import FeedbackGenerationException
+from .hashing import hash_answer_text, hash_question
+from .stats import get_item_scores, get_result_scores, update_statistics
+from .utils import calculate_score, check_answers, update_feedback_job
+import uuid
+
+registered_items_cache = LocalLRUCache(
+    max_entries=settings.REGISTERED_ITEMS_CACHE_MAX_ENTRIES,
+    ttl=settings.REGISTERED_ITEMS_CACHE_TTL,
+)
+
+
+def ingest_submission(data: dict, job_id: Optional[str] = None) -> tuple:
+    student_email: str = data.get("student_email")
+    teacher_email: str = data.get("teacher_email")
+    title: str = data.get("questionnaire_title")
+    content: str = data.get("questionnaire_content")
+    external_id: str = data.get("questionnaire_external_id")
+    items_data: list = data.get("items", [])
+    subject_name: str = data.get("subject_name")
+    subject_code: str = data.get("subject_code")
+    chat_id: str = data.get("chat_id")
+
+    with transaction.atomic():
+        student, _ = Student.objects.get_or_create(email=student_email)
+        teacher, _ = Teacher.objects.get_or_create(email=teacher_email)
+
+        chat_settings = ChatSettings.objects.get(id=chat_id)
+
+        subject = save_subject(
+            subject_code, subject_name, chat_settings, [student], teacher
+        )
+
+        questionnaire, _ = Questionnaire.objects.get_or_create(
+            external_id=external_id,
+            defaults={
+                "content": content,
+                "title": title,
+                "subject": subject,
+            },
+        )
+        questionnaire.students.add(student)
+
+        items_by_key = save_items(questionnaire, items_data)
+        item_ids = [item.id for item in items_by_key.values()]
+        previous_item_scores = get_item_scores(questionnaire, [student.id], item_ids)
+        previous_scores = get_result_scores(questionnaire, [student.id])
+        [answers] = save_answers(items_by_key, [(student, items_data)])
+        update_feedback_job(job_id, FeedbackJob.PERSISTED)
+
+        try:
+            feedbacks, correct_count_answers = check_answers(answers)
+            score = calculate_score(feedbacks)
+            save_results(questionnaire, [(student, score, answers)])
+            update_statistics(
+                questionnaire,
+                previous_item_scores,
+                get_item_scores(questionnaire, [student.id], item_ids),
+                previous_scores,
+                {student.id: score},
+            )
+        except Exception as e:
+            raise FeedbackGenerationException("Error generating feedback", str(e))
+        update_feedback_job(job_id, FeedbackJob.GRADED)
+
+    return questionnaire, chat_settings, feedbacks, correct_count_answers
+
+
+def save_subject(
+    subject_code: str,
+    subject_name: str,
+    chat_settings: ChatSettings,
+    students: List[Student],
+    teacher: Teacher,
+) -> Subject:
+    default_attributes = {}
+
+    if subject_name:
+        default_attributes["name"] = subject_name
+    default_attributes["chat_settings"] = chat_settings
+
+    subject, _ = Subject.objects.get_or_create(
+        code=subject_code,
+        defaults=default_attributes,
+    )
+
+    subject.students.add(*students)
+    subject.teachers.add(teacher)
+
+    return subject
+
+
+def parse_answer_text(answer_text: Union[str, List[str]]) -> Union[str, List[str]]:
+    try:
+        if answer_text.startswith("[") and answer_text.endswith("]"):
+            answer_text = answer_text[2:-2]
+            answer_text = answer_text.replace("\\", "")
+            answer_text = answer_text.replace('\\"', '"')
+            answer_text = answer_text.split('","')
+    except Exception:
+        pass
+
+    return answer_text
+
+
+def get_or_create_students(emails: List[str]) -> Dict[str, Student]:
+    Student.objects.bulk_create(
+        [Student(email=email) for email in set(emails)], ignore_conflicts=True
+    )
+
+    return {
+        student.email: student for student in Student.objects.filter(email__in=emails)
+    }
+
+
+def save_items(questionnaire: Questionnaire, items_data: list) -> Dict[str, Item]:
+    item_ids = {
+        str(item_data.get("item_id"))
+        for item_data in items_data
+        if item_data.get("item_id")
+    }
+    items_by_key = get_registered_items(questionnaire, item_ids) if item_ids else {}
+
+    question_hashes = {
+        get_item_key(item_data)
+        for item_data in items_data
+        if not item_data.get("item_id")
+    }
+    if not question_hashes:
+        return items_by_key
+
+    items_by_key.update(get_items_by_question_hash(questionnaire, question_hashes))
+
+    new_items = {}
+    for item_data in items_data:
+        item_key = get_item_key(item_data)
+        if item_key not in items_by_key and item_key not in new_items:
+            new_items[item_key] = Item(
+                questionnaire=questionnaire,
+                question=item_data.get("question"),
+                question_hash=item_key,
+                subcontent=item_data.get("subcontent"),
+                correct_answer=item_data.get("correct_answer"),
+            )
+
+    if new_items:
+        Item.objects.bulk_create(new_items.values(), ignore_conflicts=True)
+        items_by_key.update(get_items_by_question_hash(questionnaire, new_items.keys()))
+
+    return items_by_key
+
+
+def get_items_by_question_hash(
+    questionnaire: Questionnaire, question_hashes: Iterable[str]
+) -> Dict[str, Item]:
+    return {
+        item.question_hash: item
+        for item in Item.objects.filter(
+            questionnaire=questionnaire, question_hash__in=question_hashes
+        )
+    }
+
+
+def get_registered_items(
+    questionnaire: Questionnaire, item_ids: Set[str]
+) -> Dict[str, Item]:
+    cache_key = f"{questionnaire.id}:{questionnaire.version}"
+    items = registered_items_cache.get(cache_key)
+
+    if items is None or not item_ids <= items.keys():
+        items = {
+            str(item.id): item
+            for item in Item.objects.filter(questionnaire=questionnaire)
+        }
+        registered_items_cache.set(cache_key, items)
+
+    missing_item_ids = item_ids - items.keys()
+    if missing_item_ids:
+        raise Item.DoesNotExist(
+            f"Items {', '.join(sorted(missing_item_ids))} do not belong to questionnaire {questionnaire.external_id}."
+        )
+
+    return {item_id: items[item_id] for item_id in item_ids}
+
+
+def get_item_key(item_data: dict) -> str:
+    if item_data.get("item_id"):
+        return str(item_data.get("item_id"))
+
+    return hash_question(item_data.get("question"))
+
+
+def register_questionnaire(data: dict) -> Tuple[Questionnaire, List[Item], bool]:
+    teacher_email: str = data.get("teacher_email")
+    title: str = data.get("questionnaire_title")
+    content: str = data.get("questionnaire_content")
+    external_id: str = data.get("questionnaire_external_id")
+    items_data: list = data.get("items", [])
+    subject_name: str = data.get("subject_name")
+    subject_code: str = data.get("subject_code")
+    chat_id: str = data.get("chat_id")
+
+    with transaction.atomic():
+        teacher, _ = Teacher.objects.get_or_create(email=teacher_email)
+        chat_settings = ChatSettings.objects.get(id=chat_id)
+        subject = save_subject(subject_code, subject_name, chat_settings, [], teacher)
+
+        (
+            questionnaire,
+            created,
+        ) = Questionnaire.objects.select_for_update().get_or_create(
+            external_id=external_id,
+            defaults={
+                "content": content,
+                "title": title,
+                "subject": subject,
+            },
+        )
+        changed = (questionnaire.title, questionnaire.content) != (title, content)
+
+        items_by_key = get_items_by_question_hash(
+            questionnaire, [get_item_key(item_data) for item_data in items_data]
+        )
+
+        new_items = []
+        updated_items = []
+        previous_correct_answers = {}
+        for item_data in items_data:
+            item_key = get_item_key(item_data)
+            item = items_by_key.get(item_key)
+
+            if item is None:
+                item = Item(
+                    questionnaire=questionnaire,
+                    question=item_data.get("question"),
+                    question_hash=item_key,
+                    subcontent=item_data.get("subcontent"),
+                    correct_answer=item_data.get("correct_answer"),
+                )
+                items_by_key[item_key] = item
+                new_items.append(item)
+            elif (item.subcontent, item.correct_answer) != (
+                item_data.get("subcontent"),
+                item_data.get("correct_answer"),
+            ):
+                previous_correct_answers[item.id] = item.correct_answer
+                item.subcontent = item_data.get("subcontent")
+                item.correct_answer = item_data.get("correct_answer")
+                updated_items.append(item)
+
+        Item.objects.bulk_create(new_items)
+        Item.objects.bulk_update(updated_items, ["subcontent", "correct_answer"])
+        schedule_regrade(
+            [
+                item.id
+                for item in updated_items
+                if item.correct_answer != previous_correct_answers[item.id]
+            ]
+        )
+
+        if not created and (changed or new_items or updated_items):
+            questionnaire.title = title
+            questionnaire.content = content
+            questionnaire.version += 1
+            questionnaire.save(update_fields=["title", "content", "version"])
+
+    items = [items_by_key[get_item_key(item_data)] for item_data in items_data]
+
+    return questionnaire, items, created
+
+
+def save_answers(
+    items_by_key: Dict[str, Item],
+    submissions: List[Tuple[Student, list]],
+) -> List[List[Answer]]:
+    submitted_answers = []
+    answer_texts = {}
+
+    for student, items_data in submissions:
+        answer_keys = []
+        for item_data in items_data:
+            item = items_by_key[get_item_key(item_data)]
+            answer_text = parse_answer_text(item_data.get("answer"))
+            answer_key = (item.id, hash_answer_text(answer_text))
+
+            answer_texts.setdefault(answer_key, (item, answer_text))
+            answer_keys.append(answer_key)
+
+        submitted_answers.append((student, answer_keys))
+
+    answers_by_key = get_answers_by_text_hash(answer_texts.keys())
+
+    new_answers = [
+        Answer(item=item, text=answer_text, text_hash=text_hash)
+        for (_, text_hash), (item, answer_text) in answer_texts.items()
+        if (item.id, text_hash) not in answers_by_key
+    ]
+    if new_answers:
+        Answer.objects.bulk_create(new_answers, ignore_conflicts=True)
+        answers_by_key.update(
+            get_answers_by_text_hash(
+                (answer.item_id, answer.text_hash) for answer in new_answers
+            )
+        )
+
+    student_answers = []
+    answer_students = set()
+
+    for student, answer_keys in submitted_answers:
+        answers = []
+        for answer_key in answer_keys:
+            answer = answers_by_key[answer_key]
+            answer.item = answer_texts[answer_key][0]
+            answers.append(answer)
+            answer_students.add((answer.id, student.id))
+
+        student_answers.append(answers)
+
+    Answer.students.through.objects.bulk_create(
+        [
+            Answer.students.through(answer_id=answer_id, student_id=student_id)
+            for answer_id, student_id in answer_students
+        ],
+        ignore_conflicts=True,
+    )
+
+    return student_answers
+
+
+def get_answers_by_text_hash(
+    answer_keys: Iterable[Tuple[uuid.UUID, str]],
+) -> Dict[Tuple[uuid.UUID, str], Answer]:
+    answer_keys = set(answer_keys)
+    if not answer_keys:
+        return {}
+
+    return {
+        (answer.item_id, answer.text_hash): answer
+        for answer in Answer.objects.filter(
+            item_id__in={item_id for item_id, _ in answer_keys},
+            text_hash__in={text_hash for _, text_hash in answer_keys},
+        )
+        if (answer.item_id, answer.text_hash) in answer_keys
+    }
+
+
+def save_results(
+    questionnaire: Questionnaire,
+    student_scores: List[Tuple[Student, float, List[Answer]]],
+) -> List[Result]:
+    results = Result.objects.bulk_create(
+        [
+            Result(score=score, questionnaire=questionnaire, student=student)
+            for student, score, _ in student_scores
+        ]
+    )
+    Result.answers.through.objects.bulk_create(
+        [
+            Result.answers.through(result_id=result.id, answer_id=answer_id)
+            for result, (_, _, answers) in zip(results, student_scores)
+            for answer_id in {answer.id for answer in answers}
+        ]
+    )
+
+    return results
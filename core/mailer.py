@@ -0,0 +1,92 @@
+from threading import Lock
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from .rate_limit import RateLimiter
+import logging
+import smtplib
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+
+    return isinstance(
+        error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+    )
+
+
+class Mailer:
+    def __init__(
+        self,
+        max_idle: float,
+        max_retries: int,
+        messages_per_minute: int,
+    ) -> None:
+        self.max_idle = max_idle
+        self.max_retries = max_retries
+        self.rate_limiter = RateLimiter(
+            f"smtp:{settings.EMAIL_HOST}:{settings.EMAIL_HOST_USER}",
+            requests_per_minute=messages_per_minute,
+        )
+        self._lock = Lock()
+        self._connection = None
+        self._last_used = 0.0
+
+    def send(self, message: EmailMessage) -> None:
+        with self._lock:
+            self.rate_limiter.acquire(0)
+            self._send_message(message)
+
+    def _send_message(self, message: EmailMessage) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._send_over_connection(message)
+                return
+            except Exception as e:
+                self.close()
+                if attempt >= self.max_retries or not is_transient_smtp_error(e):
+                    raise
+
+                logger.warning("Reconnecting to the email server: %s", e)
+                time.sleep(settings.EMAIL_RETRY_BACKOFF * 2**attempt)
+
+    def _send_over_connection(self, message: EmailMessage) -> None:
+        if (
+            self._connection is not None
+            and time.monotonic() - self._last_used > self.max_idle
+        ):
+            self.close()
+
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+
+        self._connection.send_messages([message])
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+
+        try:
+            self._connection.close()
+        except Exception as e:
+            logger.warning("Error closing email connection: %s", e)
+
+        self._connection = None
+
+
+mailer = Mailer(
+    max_idle=settings.EMAIL_CONNECTION_MAX_IDLE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    messages_per_minute=settings.EMAIL_MESSAGES_PER_MINUTE,
+)
+
+
+@worker_process_shutdown.connect
+def close_mailer(**kwargs) -> None:
+    mailer.close()
@@ -0,0 +1,141 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from core.hashing import hash_answer_text, hash_question
+from core.models import (
+    Answer,
+    ChatSettings,
+    Item,
+    Questionnaire,
+    Result,
+    Student,
+    Subject,
+)
+from core.reports import write_report_workbook
+import tempfile
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the query count and runtime of the questionnaire report, either "
+        "for an existing questionnaire or for synthetic ones that are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questionnaire-external-id")
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            default=["10x5", "100x10", "300x30"],
+            help="Synthetic questionnaire sizes as <students>x<items>.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options["questionnaire_external_id"]:
+            try:
+                questionnaire = Questionnaire.objects.get(
+                    external_id=options["questionnaire_external_id"]
+                )
+            except Questionnaire.DoesNotExist:
+                raise CommandError("Questionnaire does not exist.")
+
+            self._benchmark(str(questionnaire), questionnaire, options["repeat"])
+            return
+
+        chat_settings = ChatSettings.objects.first()
+        if chat_settings is None:
+            raise CommandError("At least one chat settings is required.")
+
+        for size in options["sizes"]:
+            try:
+                student_count, item_count = (int(value) for value in size.split("x"))
+            except ValueError:
+                raise CommandError(f"Invalid size: {size}")
+
+            with transaction.atomic():
+                questionnaire = self._create_questionnaire(
+                    chat_settings, student_count, item_count
+                )
+                self._benchmark(size, questionnaire, options["repeat"])
+                transaction.set_rollback(True)
+
+    def _benchmark(self, label: str, questionnaire: Questionnaire, repeat: int):
+        durations = []
+        for _ in range(repeat):
+            with tempfile.NamedTemporaryFile(suffix=".xlsx") as report_file:
+                with CaptureQueriesContext(connection) as queries:
+                    started_at = time.perf_counter()
+                    write_report_workbook(questionnaire, report_file.name)
+                    durations.append(time.perf_counter() - started_at)
+
+        self.stdout.write(
+            f"{label}: {len(queries)} queries, best {min(durations):.3f}s, "
+            f"mean {sum(durations) / len(durations):.3f}s"
+        )
+
+    def _create_questionnaire(
+        self, chat_settings: ChatSettings, student_count: int, item_count: int
+    ) -> Questionnaire:
+        suffix = uuid.uuid4().hex
+        subject = Subject.objects.create(
+            code=f"benchmark-{suffix}", chat_settings=chat_settings
+        )
+        questionnaire = Questionnaire.objects.create(
+            title="Benchmark",
+            content="Benchmark",
+            external_id=f"benchmark-{suffix}",
+            subject=subject,
+        )
+        students = Student.objects.bulk_create(
+            [
+                Student(email=f"student{index}-{suffix}@benchmark.local")
+                for index in range(student_count)
+            ]
+        )
+        questionnaire.students.add(*students)
+
+        items = Item.objects.bulk_create(
+            [
+                Item(
+                    questionnaire=questionnaire,
+                    question=f"Question {index}",
+                    question_hash=hash_question(f"Question {index}"),
+                    subcontent="Benchmark",
+                    correct_answer=["right"],
+                )
+                for index in range(item_count)
+            ]
+        )
+        answers = Answer.objects.bulk_create(
+            [
+                Answer(
+                    item=item,
+                    text=[text],
+                    text_hash=hash_answer_text([text]),
+                    correct=correct,
+                )
+                for item in items
+                for text, correct in (("right", 1), ("wrong", 0))
+            ]
+        )
+        Answer.students.through.objects.bulk_create(
+            [
+                Answer.students.through(
+                    answer_id=answers[2 * item_index + student_index % 2].id,
+                    student_id=student.id,
+                )
+                for student_index, student in enumerate(students)
+                for item_index in range(item_count)
+            ]
+        )
+        Result.objects.bulk_create(
+            [
+                Result(questionnaire=questionnaire, student=student, score=50)
+                for student in students
+            ]
+        )
+
+        return questionnaire
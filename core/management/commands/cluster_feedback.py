@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Questionnaire
+from core.tasks import cluster_and_generate_feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Cluster near-duplicate wrong answers of a questionnaire and generate one "
+        "feedback per cluster."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("questionnaire_external_id")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=settings.FEEDBACK_CLUSTER_THRESHOLD,
+            help="Minimum Jaccard similarity between answers of the same cluster.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            questionnaire = Questionnaire.objects.select_related(
+                "subject__chat_settings"
+            ).get(external_id=options["questionnaire_external_id"])
+        except Questionnaire.DoesNotExist:
+            raise CommandError("Questionnaire does not exist.")
+
+        report = cluster_and_generate_feedback(
+            questionnaire,
+            questionnaire.subject.chat_settings,
+            options["threshold"],
+        )
+
+        for key, value in report.items():
+            self.stdout.write(f"{key}: {value}")
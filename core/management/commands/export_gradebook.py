@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Subject
+from core.reports import write_gradebook_workbook
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the gradebook of a subject with the latest score of every student "
+        "in each questionnaire and their mastery per subcontent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("subject_code")
+        parser.add_argument("output_path")
+
+    def handle(self, *args, **options):
+        try:
+            subject = Subject.objects.get(code=options["subject_code"])
+        except Subject.DoesNotExist:
+            raise CommandError("Subject does not exist.")
+
+        path = write_gradebook_workbook(subject, options["output_path"])
+        self.stdout.write(f"Gradebook written to {path}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Questionnaire
+from core.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized item statistics and score histogram of "
+        "questionnaires from their answers and results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("questionnaire_external_ids", nargs="*")
+
+    def handle(self, *args, **options):
+        questionnaires = Questionnaire.objects.all()
+
+        external_ids = options["questionnaire_external_ids"]
+        if external_ids:
+            questionnaires = questionnaires.filter(external_id__in=external_ids)
+            missing_external_ids = set(external_ids) - set(
+                questionnaires.values_list("external_id", flat=True)
+            )
+            if missing_external_ids:
+                raise CommandError(
+                    f"Questionnaires do not exist: {', '.join(sorted(missing_external_ids))}"
+                )
+
+        for questionnaire in questionnaires.iterator():
+            report = rebuild_statistics(questionnaire)
+            self.stdout.write(
+                f"{questionnaire.external_id}: {report['items']} items, "
+                f"{report['students']} students"
+            )
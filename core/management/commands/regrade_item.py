@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Item, Questionnaire
+from core.utils import grade_questionnaire, regrade_item
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the scores of the answers and results affected by an item's "
+        "correct answer, or by every item of a questionnaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("item_id", nargs="?")
+        parser.add_argument(
+            "--questionnaire",
+            dest="questionnaire_external_id",
+            help="External ID of a questionnaire whose items should all be regraded.",
+        )
+
+    def handle(self, *args, **options):
+        if options["questionnaire_external_id"]:
+            try:
+                questionnaire = Questionnaire.objects.get(
+                    external_id=options["questionnaire_external_id"]
+                )
+            except Questionnaire.DoesNotExist:
+                raise CommandError("Questionnaire does not exist.")
+
+            report = grade_questionnaire(questionnaire)
+        elif options["item_id"]:
+            try:
+                item = Item.objects.get(id=options["item_id"])
+            except (Item.DoesNotExist, ValueError):
+                raise CommandError("Item does not exist.")
+
+            report = regrade_item(item)
+        else:
+            raise CommandError("Provide an item_id or --questionnaire.")
+
+        for key, value in report.items():
+            self.stdout.write(f"{key}: {value}")
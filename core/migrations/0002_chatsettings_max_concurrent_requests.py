@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsettings',
+            name='max_concurrent_requests',
+            field=models.PositiveIntegerField(default=4),
+        ),
+    ]
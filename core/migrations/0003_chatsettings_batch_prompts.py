@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_chatsettings_max_concurrent_requests"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatsettings",
+            name="batch_prompts",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="chatsettings",
+            name="batch_size",
+            field=models.PositiveIntegerField(default=10),
+        ),
+    ]
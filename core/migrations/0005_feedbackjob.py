@@ -0,0 +1,49 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:22
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_chatsettings_rate_limits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("received", "Received"),
+                            ("persisted", "Persisted"),
+                            ("graded", "Graded"),
+                            ("generated", "Generated"),
+                            ("rendered", "Rendered"),
+                            ("emailed", "Emailed"),
+                            ("partial", "Emailed with pending items"),
+                            ("failed", "Failed"),
+                        ],
+                        default="received",
+                        max_length=20,
+                    ),
+                ),
+                ("payload", models.JSONField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
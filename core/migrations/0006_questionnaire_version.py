@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_feedbackjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="questionnaire",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
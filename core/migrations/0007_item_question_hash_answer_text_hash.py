@@ -0,0 +1,25 @@
+# Generated by Django 4.2.13 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_questionnaire_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="text_hash",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="question_hash",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db import migrations
+from core.hashing import hash_answer_text, hash_question
+
+BATCH_SIZE = 1000
+
+
+def backfill_item_hashes(apps, schema_editor):
+    Item = apps.get_model("core", "Item")
+    Answer = apps.get_model("core", "Answer")
+
+    kept_items = {}
+    current_questionnaire_id = None
+    batch = []
+
+    for item in (
+        Item.objects.only("id", "question", "questionnaire_id")
+        .order_by("questionnaire_id", "created_at")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        if item.questionnaire_id != current_questionnaire_id:
+            current_questionnaire_id = item.questionnaire_id
+            kept_items = {}
+
+        item.question_hash = hash_question(item.question)
+        kept_item_id = kept_items.setdefault(item.question_hash, item.id)
+
+        if kept_item_id != item.id:
+            Answer.objects.filter(item_id=item.id).update(item_id=kept_item_id)
+            Item.objects.filter(id=item.id).delete()
+            continue
+
+        batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            Item.objects.bulk_update(batch, ["question_hash"])
+            batch = []
+
+    Item.objects.bulk_update(batch, ["question_hash"])
+
+
+def backfill_answer_hashes(apps, schema_editor):
+    Answer = apps.get_model("core", "Answer")
+    AnswerStudents = Answer.students.through
+
+    kept_answers = {}
+    current_item_id = None
+    batch = []
+
+    for answer in (
+        Answer.objects.only("id", "text", "item_id")
+        .order_by("item_id", "created_at")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        if answer.item_id != current_item_id:
+            current_item_id = answer.item_id
+            kept_answers = {}
+
+        answer.text_hash = hash_answer_text(answer.text)
+        kept_answer_id = kept_answers.setdefault(answer.text_hash, answer.id)
+
+        if kept_answer_id != answer.id:
+            kept_student_ids = AnswerStudents.objects.filter(
+                answer_id=kept_answer_id
+            ).values("student_id")
+            AnswerStudents.objects.filter(answer_id=answer.id).exclude(
+                student_id__in=kept_student_ids
+            ).update(answer_id=kept_answer_id)
+            AnswerStudents.objects.filter(answer_id=answer.id).delete()
+            Answer.objects.filter(id=answer.id).delete()
+            continue
+
+        batch.append(answer)
+        if len(batch) >= BATCH_SIZE:
+            Answer.objects.bulk_update(batch, ["text_hash"])
+            batch = []
+
+    Answer.objects.bulk_update(batch, ["text_hash"])
+
+
+def backfill_content_hashes(apps, schema_editor):
+    backfill_item_hashes(apps, schema_editor)
+    backfill_answer_hashes(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_item_question_hash_answer_text_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
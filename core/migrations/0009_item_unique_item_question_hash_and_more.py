@@ -0,0 +1,26 @@
+# Generated by Django 4.2.13 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_backfill_content_hashes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="item",
+            constraint=models.UniqueConstraint(
+                fields=("questionnaire", "question_hash"),
+                name="unique_item_question_hash",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="answer",
+            constraint=models.UniqueConstraint(
+                fields=("item", "text_hash"), name="unique_answer_text_hash"
+            ),
+        ),
+    ]
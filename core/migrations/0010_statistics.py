@@ -0,0 +1,78 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_item_unique_item_question_hash_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionnaireStatistics",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("student_count", models.PositiveIntegerField(default=0)),
+                (
+                    "score_sum",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("histogram", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "questionnaire",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="core.questionnaire",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ItemStatistics",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("correct_count", models.PositiveIntegerField(default=0)),
+                ("partially_correct_count", models.PositiveIntegerField(default=0)),
+                ("incorrect_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="core.item",
+                    ),
+                ),
+                (
+                    "questionnaire",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="item_statistics",
+                        to="core.questionnaire",
+                    ),
+                ),
+            ],
+        ),
+    ]
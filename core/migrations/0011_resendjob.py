@@ -0,0 +1,66 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_statistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedbackjob",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="feedbackjob",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="feedbackjob",
+            name="student_email",
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.CreateModel(
+            name="ResendJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("recipient_emails", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "questionnaire",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resend_jobs",
+                        to="core.questionnaire",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="feedbackjob",
+            name="resend_job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="feedback_jobs",
+                to="core.resendjob",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_resendjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="result",
+            name="answers",
+            field=models.ManyToManyField(
+                blank=True, related_name="results", to="core.answer"
+            ),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
-from openai import OpenAI
+from .clients import invalidate_openai_client
+from .hashing import hash_answer_text, hash_question
 import uuid
 
 
@@ -37,7 +38,13 @@ class ChatSettings(models.Model):
     top_p = models.DecimalField(max_digits=5, decimal_places=2)
     frequency_penalty = models.DecimalField(max_digits=5, decimal_places=2)
     presence_penalty = models.DecimalField(max_digits=5, decimal_places=2)
+    max_concurrent_requests = models.PositiveIntegerField(default=4)
+    batch_prompts = models.BooleanField(default=False)
+    batch_size = models.PositiveIntegerField(default=10)
+    requests_per_minute = models.PositiveIntegerField(blank=True, null=True)
+    tokens_per_minute = models.PositiveIntegerField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def clean(self):
         if not (0 <= self.temperature <= 2.00):
@@ -56,11 +63,25 @@ class ChatSettings(models.Model):
             raise ValidationError(
                 {"presence_penalty": "Presence penalty must be between 0.00 and 2.00."}
             )
+        if self.max_concurrent_requests < 1:
+            raise ValidationError(
+                {
+                    "max_concurrent_requests": "Max concurrent requests must be at least 1."
+                }
+            )
+        if self.batch_size < 1:
+            raise ValidationError({"batch_size": "Batch size must be at least 1."})
 
     def __str__(self):
         return f"{self.id}"
 
 
+@receiver(post_save, sender=ChatSettings)
+@receiver(post_delete, sender=ChatSettings)
+def invalidate_chat_settings_client(sender, instance, **kwargs):
+    invalidate_openai_client(instance.id)
+
+
 class Subject(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255, blank=True, null=True)
@@ -83,6 +104,7 @@ class Questionnaire(models.Model):
     content = models.CharField(max_length=255, blank=False, null=False)
     created_at = models.DateTimeField(auto_now_add=True)
     external_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    version = models.PositiveIntegerField(default=1)
 
     subject = models.ForeignKey(
         Subject, related_name="questionnaires", on_delete=models.RESTRICT
@@ -96,6 +118,7 @@ class Questionnaire(models.Model):
 class Item(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     question = models.TextField(blank=False, null=False)
+    question_hash = models.CharField(max_length=64, editable=False)
     subcontent = models.CharField(max_length=255, blank=False, null=False)
     correct_answer = models.JSONField(blank=False, null=False, default=list)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -104,13 +127,70 @@ class Item(models.Model):
         Questionnaire, related_name="items", on_delete=models.RESTRICT
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["questionnaire", "question_hash"],
+                name="unique_item_question_hash",
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        self.question_hash = hash_question(self.question)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "question" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "question_hash"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.question[:20]}..."
 
 
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def bump_questionnaire_version(sender, instance, created=False, **kwargs):
+    if not created:
+        Questionnaire.objects.filter(id=instance.questionnaire_id).update(
+            version=models.F("version") + 1
+        )
+
+
+@receiver(pre_save, sender=Item)
+def track_correct_answer_change(sender, instance, raw=False, **kwargs):
+    instance.correct_answer_changed = False
+    if raw or instance._state.adding:
+        return
+
+    previous_correct_answer = (
+        Item.objects.filter(id=instance.id)
+        .values_list("correct_answer", flat=True)
+        .first()
+    )
+    instance.correct_answer_changed = (
+        previous_correct_answer is not None
+        and previous_correct_answer != instance.correct_answer
+    )
+
+
+@receiver(post_save, sender=Item)
+def schedule_item_regrade(sender, instance, created=False, **kwargs):
+    if not created and getattr(instance, "correct_answer_changed", False):
+        schedule_regrade([instance.id])
+
+
+def schedule_regrade(item_ids: list) -> None:
+    from .tasks import regrade_item_answers
+
+    for item_id in item_ids:
+        transaction.on_commit(
+            lambda item_id=item_id: regrade_item_answers.delay(str(item_id))
+        )
+
+
 class Answer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     text = models.JSONField(blank=False, null=False, default=list)
+    text_hash = models.CharField(max_length=64, editable=False)
     feedback_explanation = models.TextField(blank=True, null=True)
     feedback_improve_suggestions = models.TextField(blank=True, null=True)
     correct = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
@@ -119,6 +199,20 @@ class Answer(models.Model):
     students = models.ManyToManyField(Student, related_name="answers")
     item = models.ForeignKey(Item, related_name="answers", on_delete=models.RESTRICT)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "text_hash"], name="unique_answer_text_hash"
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        self.text_hash = hash_answer_text(self.text)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "text_hash"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.text[:20]}..."
 
@@ -134,6 +228,97 @@ class Result(models.Model):
     questionnaire = models.ForeignKey(
         Questionnaire, related_name="results", on_delete=models.RESTRICT
     )
+    answers = models.ManyToManyField(Answer, related_name="results", blank=True)
 
     def __str__(self):
         return f"{self.score}"
+
+
+class FeedbackJob(models.Model):
+    RECEIVED = "received"
+    PERSISTED = "persisted"
+    GRADED = "graded"
+    GENERATED = "generated"
+    RENDERED = "rendered"
+    EMAILED = "emailed"
+    PARTIAL = "partial"
+    FAILED = "failed"
+    FINISHED_STAGES = (EMAILED, PARTIAL, FAILED)
+    STAGE_CHOICES = [
+        (RECEIVED, "Received"),
+        (PERSISTED, "Persisted"),
+        (GRADED, "Graded"),
+        (GENERATED, "Generated"),
+        (RENDERED, "Rendered"),
+        (EMAILED, "Emailed"),
+        (PARTIAL, "Emailed with pending items"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default=RECEIVED)
+    payload = models.JSONField(blank=True, null=True)
+    student_email = models.EmailField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    resend_job = models.ForeignKey(
+        "ResendJob",
+        related_name="feedback_jobs",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+
+    def __str__(self):
+        return f"{self.id} - {self.stage}"
+
+
+class ResendJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient_emails = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    questionnaire = models.ForeignKey(
+        Questionnaire, related_name="resend_jobs", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f"{self.id} - {self.questionnaire}"
+
+
+class ItemStatistics(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    correct_count = models.PositiveIntegerField(default=0)
+    partially_correct_count = models.PositiveIntegerField(default=0)
+    incorrect_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    questionnaire = models.ForeignKey(
+        Questionnaire, related_name="item_statistics", on_delete=models.CASCADE
+    )
+    item = models.OneToOneField(
+        Item, related_name="statistics", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f"{self.item} - {self.correct_count}/{self.partially_correct_count}/{self.incorrect_count}"
+
+
+class QuestionnaireStatistics(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student_count = models.PositiveIntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    histogram = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    questionnaire = models.OneToOneField(
+        Questionnaire, related_name="statistics", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f"{self.questionnaire} - {self.student_count}"
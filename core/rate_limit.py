@@ -0,0 +1,189 @@
+from typing import Mapping, Optional
+from django.conf import settings
+import hashlib
+import logging
+import random
+import re
+import redis
+import time
+
+logger = logging.getLogger(__name__)
+
+ACQUIRE_SCRIPT = """
+local now_seconds = redis.call("TIME")
+local now = tonumber(now_seconds[1]) * 1000 + math.floor(tonumber(now_seconds[2]) / 1000)
+local safety_factor = tonumber(ARGV[3])
+local requested_tokens = tonumber(ARGV[4])
+
+local cooldown = redis.call("PTTL", KEYS[3])
+if cooldown > 0 then
+    return cooldown
+end
+
+local function resolve_limit(configured, name)
+    local limit = tonumber(configured)
+    if limit <= 0 then
+        limit = (tonumber(redis.call("HGET", KEYS[4], name)) or 0) * safety_factor
+    end
+    return limit
+end
+
+local function refill(key, limit, amount)
+    if limit <= 0 then
+        return 0, 0
+    end
+    local bucket = redis.call("HMGET", key, "tokens", "timestamp")
+    local tokens = tonumber(bucket[1]) or limit
+    local timestamp = tonumber(bucket[2]) or now
+    tokens = math.min(limit, tokens + math.max(now - timestamp, 0) * limit / 60000)
+    amount = math.min(amount, limit)
+    if tokens < amount then
+        return math.ceil((amount - tokens) * 60000 / limit), tokens
+    end
+    return 0, tokens - amount
+end
+
+local requests_limit = resolve_limit(ARGV[1], "requests")
+local tokens_limit = resolve_limit(ARGV[2], "tokens")
+local requests_wait, requests_left = refill(KEYS[1], requests_limit, 1)
+local tokens_wait, tokens_left = refill(KEYS[2], tokens_limit, requested_tokens)
+local wait = math.max(requests_wait, tokens_wait)
+if wait > 0 then
+    return wait
+end
+
+if requests_limit > 0 then
+    redis.call("HSET", KEYS[1], "tokens", requests_left, "timestamp", now)
+    redis.call("PEXPIRE", KEYS[1], 120000)
+end
+if tokens_limit > 0 then
+    redis.call("HSET", KEYS[2], "tokens", tokens_left, "timestamp", now)
+    redis.call("PEXPIRE", KEYS[2], 120000)
+end
+
+return 0
+"""
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+_redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    global _redis_client
+
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.RATE_LIMIT_REDIS_URL)
+
+    return _redis_client
+
+
+def parse_duration(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    return sum(
+        float(amount) * DURATION_UNITS[unit]
+        for amount, unit in DURATION_PATTERN.findall(value)
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def backoff_delay(attempt: int, minimum: float = 0.0) -> float:
+    ceiling = min(
+        settings.OPENAI_BACKOFF_MAX, settings.OPENAI_BACKOFF_BASE * 2**attempt
+    )
+
+    return max(minimum, random.uniform(0, ceiling))
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        api_key: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        self.key_prefix = f"ratelimit:{key_hash}"
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+
+    @classmethod
+    def for_chat_settings(cls, chat_settings) -> "RateLimiter":
+        return cls(
+            chat_settings.openai_api_key,
+            chat_settings.requests_per_minute,
+            chat_settings.tokens_per_minute,
+        )
+
+    def acquire(self, tokens: int) -> None:
+        while True:
+            try:
+                wait = get_redis_client().eval(
+                    ACQUIRE_SCRIPT,
+                    4,
+                    f"{self.key_prefix}:requests",
+                    f"{self.key_prefix}:tokens",
+                    f"{self.key_prefix}:cooldown",
+                    f"{self.key_prefix}:limits",
+                    self.requests_per_minute,
+                    self.tokens_per_minute,
+                    settings.RATE_LIMIT_SAFETY_FACTOR,
+                    tokens,
+                )
+            except redis.RedisError as e:
+                logger.warning("Error acquiring rate limit: %s", e)
+                return
+
+            if wait <= 0:
+                return
+
+            time.sleep(wait / 1000 + random.uniform(0, 0.1))
+
+    def cooldown(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+
+        try:
+            cooldown_key = f"{self.key_prefix}:cooldown"
+            remaining = get_redis_client().pttl(cooldown_key)
+            if remaining < seconds * 1000:
+                get_redis_client().set(cooldown_key, 1, px=int(seconds * 1000))
+        except redis.RedisError as e:
+            logger.warning("Error setting rate limit cooldown: %s", e)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        limits = {
+            name: headers.get(f"x-ratelimit-limit-{name}")
+            for name in ("requests", "tokens")
+        }
+        limits = {name: value for name, value in limits.items() if value}
+
+        try:
+            if limits:
+                get_redis_client().hset(f"{self.key_prefix}:limits", mapping=limits)
+        except redis.RedisError as e:
+            logger.warning("Error storing rate limits: %s", e)
+
+        for name in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{name}")
+            if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+                self.cooldown(parse_duration(headers.get(f"x-ratelimit-reset-{name}")))
+
+
+def get_retry_after(headers: Mapping[str, str]) -> float:
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        return parse_duration(retry_after_ms) / 1000
+
+    return parse_duration(headers.get("retry-after"))
@@ -0,0 +1,81 @@
+from typing import Optional
+from celery.signals import worker_process_init
+from django.conf import settings
+from django.template.loader import get_template
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+from .cache import pdf_cache
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_TEMPLATE = "feedback_template.html"
+
+
+class FeedbackRenderer:
+    def __init__(self) -> None:
+        self.template = get_template(FEEDBACK_TEMPLATE)
+        self.font_config = FontConfiguration()
+        self.base_url = str(settings.BASE_DIR)
+
+        with open(settings.FEEDBACK_STYLESHEET, encoding="utf-8") as stylesheet_file:
+            stylesheet = stylesheet_file.read()
+        self.stylesheet_hash = hashlib.sha256(stylesheet.encode("utf-8")).hexdigest()
+        self.stylesheet = CSS(
+            string=stylesheet, base_url=self.base_url, font_config=self.font_config
+        )
+
+    def render_html(self, context: dict) -> str:
+        return self.template.render(context)
+
+    def write_pdf(self, html_string: str) -> bytes:
+        return HTML(string=html_string, base_url=self.base_url).write_pdf(
+            stylesheets=[self.stylesheet], font_config=self.font_config
+        )
+
+
+_renderer: Optional[FeedbackRenderer] = None
+
+
+def get_renderer() -> FeedbackRenderer:
+    global _renderer
+
+    if _renderer is None:
+        _renderer = FeedbackRenderer()
+
+    return _renderer
+
+
+def render_feedback_pdf(context: dict) -> bytes:
+    renderer = get_renderer()
+    html_string = renderer.render_html(context)
+    cache_key = pdf_cache.make_key(html_string, renderer.stylesheet_hash)
+
+    pdf_file = pdf_cache.get(cache_key)
+    if pdf_file is None:
+        pdf_file = renderer.write_pdf(html_string)
+        pdf_cache.set(cache_key, pdf_file)
+
+    return pdf_file
+
+
+@worker_process_init.connect
+def warm_renderer(**kwargs) -> None:
+    if not settings.RENDER_WORKER:
+        return
+
+    try:
+        renderer = get_renderer()
+        renderer.write_pdf(
+            renderer.render_html(
+                {
+                    "questionnaire_title": "",
+                    "feedbacks": [],
+                    "correct_count_answers": 0,
+                    "student_email": "",
+                }
+            )
+        )
+    except Exception:
+        logger.exception("Error warming feedback renderer")
@@ -0,0 +1,304 @@
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterator, List, Optional, Tuple
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from openpyxl import Workbook
+from .models import Answer, Item, Questionnaire, Result, Subject
+from .stats import get_question_stats
+import hashlib
+import json
+import uuid
+
+STUDENT_COLUMN = "Aluno"
+SCORE_COLUMN = "Pontuação"
+REPORT_CHUNK_SIZE = 2000
+PERFORMANCE_TABLE = "performance"
+STATISTICS_TABLE = "statistics"
+
+
+QUESTION_STATS_HEADERS = [
+    "Questão",
+    "Corretas",
+    "Parcialmente Corretas",
+    "Incorretas",
+    "Total",
+    "Corretas %",
+    "Parcialmente Corretas %",
+    "Incorretas %",
+]
+
+
+def write_report_workbook(questionnaire: Questionnaire, path: str) -> str:
+    items = get_report_items(questionnaire)
+
+    workbook = Workbook(write_only=True)
+    performance_sheet = workbook.create_sheet("Desempenho dos Alunos")
+    stats_sheet = workbook.create_sheet("Estatísticas das Questões")
+
+    for row in iter_performance_rows(questionnaire, items):
+        performance_sheet.append(row)
+
+    for row in iter_question_stats_rows(questionnaire, items):
+        stats_sheet.append(row)
+
+    workbook.save(path)
+
+    return path
+
+
+def iter_report_table(questionnaire: Questionnaire, table: str) -> Iterator[list]:
+    items = get_report_items(questionnaire)
+
+    if table == PERFORMANCE_TABLE:
+        return iter_performance_rows(questionnaire, items)
+
+    return iter_question_stats_rows(questionnaire, items)
+
+
+def get_report_items(questionnaire: Questionnaire) -> List[Tuple[uuid.UUID, str]]:
+    return list(
+        questionnaire.items.order_by("created_at").values_list("id", "question")
+    )
+
+
+def iter_performance_rows(
+    questionnaire: Questionnaire, items: List[Tuple[uuid.UUID, str]]
+) -> Iterator[list]:
+    yield [STUDENT_COLUMN, *[question for _, question in items], SCORE_COLUMN]
+
+    for email, scores, score in iter_students_performance(questionnaire, items):
+        yield [email, *scores, score]
+
+
+def iter_question_stats_rows(
+    questionnaire: Questionnaire, items: List[Tuple[uuid.UUID, str]]
+) -> Iterator[list]:
+    total_count, question_stats = get_question_stats(questionnaire, items)
+
+    yield QUESTION_STATS_HEADERS
+    for question, *counts in question_stats:
+        yield [
+            question,
+            *counts,
+            total_count,
+            *[count / total_count * 100 if total_count else None for count in counts],
+        ]
+
+
+def get_report_etag(questionnaire: Questionnaire) -> str:
+    results = Result.objects.filter(questionnaire=questionnaire).aggregate(
+        count=Count("id"), last_created_at=Max("created_at"), score_sum=Sum("score")
+    )
+    answers = Answer.students.through.objects.filter(
+        answer__item__questionnaire=questionnaire
+    ).aggregate(
+        count=Count("id"),
+        last_created_at=Max("answer__created_at"),
+        correct_sum=Sum("answer__correct"),
+        student_count=Count("student_id", distinct=True),
+    )
+    members = Questionnaire.objects.filter(id=questionnaire.id).aggregate(
+        item_count=Count("items", distinct=True),
+        student_count=Count("students", distinct=True),
+    )
+    state = json.dumps(
+        [questionnaire.id, questionnaire.version, members, results, answers],
+        default=str,
+    )
+
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
+
+
+def iter_students_performance(
+    questionnaire: Questionnaire, items: List[Tuple[uuid.UUID, str]]
+) -> Iterator[Tuple[str, List[float], float]]:
+    item_indexes = {item_id: index for index, (item_id, _) in enumerate(items)}
+    latest_score = (
+        Result.objects.filter(questionnaire=questionnaire, student=OuterRef("pk"))
+        .order_by("-created_at")
+        .values("score")[:1]
+    )
+    students = (
+        questionnaire.students.annotate(score=Subquery(latest_score))
+        .order_by("id")
+        .values_list("id", "email", "score")
+    )
+    answers = (
+        Answer.students.through.objects.filter(
+            answer__item__questionnaire=questionnaire,
+            student__questionnaires=questionnaire,
+        )
+        .order_by("student_id", "answer__created_at")
+        .values_list("student_id", "answer__item_id", "answer__correct")
+    )
+
+    for (_, email, score), [student_answers] in iter_student_rows(students, answers):
+        scores = [0.0] * len(items)
+        for _, item_id, correct in student_answers:
+            scores[item_indexes[item_id]] = float(correct)
+
+        yield email, scores, float(score or 0)
+
+
+def write_gradebook_workbook(subject: Subject, path: str) -> str:
+    questionnaires = list(
+        subject.questionnaires.order_by("created_at", "id").values_list("id", "title")
+    )
+    questionnaire_indexes = {
+        questionnaire_id: index
+        for index, (questionnaire_id, _) in enumerate(questionnaires)
+    }
+    subcontents = list(
+        Item.objects.filter(questionnaire__subject=subject)
+        .order_by("subcontent")
+        .values_list("subcontent", flat=True)
+        .distinct()
+    )
+    subcontent_indexes = {
+        subcontent: index for index, subcontent in enumerate(subcontents)
+    }
+
+    students = subject.students.order_by("id").values_list("id", "email")
+    latest_results = (
+        Result.objects.filter(questionnaire__subject=subject, student__subjects=subject)
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F("student_id"), F("questionnaire_id")],
+                order_by=F("created_at").desc(),
+            )
+        )
+        .filter(row_number=1)
+        .order_by("student_id")
+        .values_list("student_id", "questionnaire_id", "score")
+    )
+    latest_answers = (
+        Answer.students.through.objects.filter(
+            answer__item__questionnaire__subject=subject, student__subjects=subject
+        )
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F("student_id"), F("answer__item_id")],
+                order_by=F("answer__created_at").desc(),
+            )
+        )
+        .filter(row_number=1)
+        .order_by("student_id")
+        .values_list("student_id", "answer__item__subcontent", "answer__correct")
+    )
+
+    questionnaire_totals = [[0.0, 0] for _ in questionnaires]
+    subcontent_totals = [[0.0, 0] for _ in subcontents]
+
+    workbook = Workbook(write_only=True)
+    scores_sheet = workbook.create_sheet("Notas por Questionário")
+    mastery_sheet = workbook.create_sheet("Domínio por Subconteúdo")
+    summary_sheet = workbook.create_sheet("Resumo da Disciplina")
+
+    scores_sheet.append(
+        [STUDENT_COLUMN, *[title for _, title in questionnaires], "Média"]
+    )
+    mastery_sheet.append([STUDENT_COLUMN, *subcontents])
+
+    for (_, email), [results, answers] in iter_student_rows(
+        students, latest_results, latest_answers
+    ):
+        scores = [None] * len(questionnaires)
+        for _, questionnaire_id, score in results:
+            index = questionnaire_indexes[questionnaire_id]
+            scores[index] = float(score)
+            questionnaire_totals[index][0] += float(score)
+            questionnaire_totals[index][1] += 1
+
+        mastery = [[0.0, 0] for _ in subcontents]
+        for _, subcontent, correct in answers:
+            index = subcontent_indexes[subcontent]
+            mastery[index][0] += float(correct)
+            mastery[index][1] += 1
+            subcontent_totals[index][0] += float(correct)
+            subcontent_totals[index][1] += 1
+
+        answered_scores = [score for score in scores if score is not None]
+        scores_sheet.append(
+            [
+                email,
+                *scores,
+                (
+                    sum(answered_scores) / len(answered_scores)
+                    if answered_scores
+                    else None
+                ),
+            ]
+        )
+        mastery_sheet.append([email, *[get_mean(*total, 100) for total in mastery]])
+
+    summary_sheet.append(["Tipo", "Nome", "Média", "Respostas"])
+    for (_, title), total in zip(questionnaires, questionnaire_totals):
+        summary_sheet.append(["Questionário", title, get_mean(*total), total[1]])
+    for subcontent, total in zip(subcontents, subcontent_totals):
+        summary_sheet.append(
+            ["Subconteúdo", subcontent, get_mean(*total, 100), total[1]]
+        )
+
+    workbook.save(path)
+
+    return path
+
+
+def get_mean(total: float, count: int, scale: float = 1) -> Optional[float]:
+    return total / count * scale if count else None
+
+
+def iter_student_rows(
+    students: QuerySet, *row_querysets: QuerySet
+) -> Iterator[Tuple[tuple, List[List[tuple]]]]:
+    row_groups = [
+        groupby(row_queryset.iterator(chunk_size=REPORT_CHUNK_SIZE), key=itemgetter(0))
+        for row_queryset in row_querysets
+    ]
+    next_groups = [next(groups, None) for groups in row_groups]
+
+    for student in students.iterator(chunk_size=REPORT_CHUNK_SIZE):
+        student_rows = []
+        for index, groups in enumerate(row_groups):
+            next_group = next_groups[index]
+            if next_group is not None and next_group[0] == student[0]:
+                student_rows.append(list(next_group[1]))
+                next_groups[index] = next(groups, None)
+            else:
+                student_rows.append([])
+
+        yield student, student_rows
+
+
+def get_gradebook_etag(subject: Subject) -> str:
+    results = Result.objects.filter(questionnaire__subject=subject).aggregate(
+        count=Count("id"), last_created_at=Max("created_at"), score_sum=Sum("score")
+    )
+    answers = Answer.students.through.objects.filter(
+        answer__item__questionnaire__subject=subject
+    ).aggregate(
+        count=Count("id"),
+        last_created_at=Max("answer__created_at"),
+        correct_sum=Sum("answer__correct"),
+    )
+    questionnaires = Questionnaire.objects.filter(subject=subject).aggregate(
+        count=Count("id"), version_sum=Sum("version")
+    )
+    state = json.dumps(
+        [subject.id, subject.students.count(), questionnaires, results, answers],
+        default=str,
+    )
+
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
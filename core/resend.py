@@ -0,0 +1,135 @@
+from collections import defaultdict
+from typing import Dict, List
+from celery import chord
+from django.db.models import F
+from django.utils import timezone
+from .models import Answer, FeedbackJob, Questionnaire, ResendJob
+from .tasks import generate_formative_feedback, summarize_feedback_resend
+from .utils import grade_answers, save_correct_answers
+
+
+def start_feedback_resend(
+    questionnaire: Questionnaire,
+    student_emails: List[str],
+    recipient_emails: Dict[str, List[str]],
+) -> ResendJob:
+    resend_job = ResendJob.objects.create(
+        questionnaire=questionnaire, recipient_emails=recipient_emails
+    )
+    feedback_jobs = FeedbackJob.objects.bulk_create(
+        [
+            FeedbackJob(
+                resend_job=resend_job,
+                student_email=student_email,
+                stage=FeedbackJob.RECEIVED,
+            )
+            for student_email in dict.fromkeys(student_emails)
+        ]
+    )
+
+    dispatch_feedback_resend(resend_job, feedback_jobs)
+
+    return resend_job
+
+
+def retry_feedback_resend(resend_job: ResendJob) -> int:
+    feedback_jobs = list(
+        resend_job.feedback_jobs.filter(
+            stage__in=[FeedbackJob.FAILED, FeedbackJob.PARTIAL]
+        )
+    )
+    if not feedback_jobs:
+        return 0
+
+    FeedbackJob.objects.filter(id__in=[job.id for job in feedback_jobs]).update(
+        stage=FeedbackJob.RECEIVED,
+        error=None,
+        started_at=None,
+        finished_at=None,
+        updated_at=timezone.now(),
+    )
+
+    dispatch_feedback_resend(resend_job, feedback_jobs)
+
+    return len(feedback_jobs)
+
+
+def dispatch_feedback_resend(
+    resend_job: ResendJob, feedback_jobs: List[FeedbackJob]
+) -> int:
+    questionnaire = resend_job.questionnaire
+    recipient_emails = resend_job.recipient_emails
+    student_receive_email = len(recipient_emails.get("students", [])) > 0
+    recipient_emails_without_student = recipient_emails.get(
+        "teachers", []
+    ) + recipient_emails.get("others", [])
+
+    answers_by_student = defaultdict(list)
+    for answer in (
+        Answer.objects.filter(
+            item__questionnaire=questionnaire,
+            students__email__in=[job.student_email for job in feedback_jobs],
+        )
+        .select_related("item")
+        .annotate(student_email=F("students__email"))
+        .order_by("created_at")
+    ):
+        answers_by_student[answer.student_email].append(answer)
+
+    feedback_tasks = []
+    graded_job_ids = []
+    missing_job_ids = []
+    changed_answers = {}
+    answer_keys = {}
+    for job in feedback_jobs:
+        answers = answers_by_student.get(job.student_email)
+        if not answers:
+            missing_job_ids.append(job.id)
+            continue
+
+        previous_scores = [answer.correct for answer in answers]
+        feedbacks, correct_count_answers = grade_answers(answers, answer_keys)
+        changed_answers.update(
+            {
+                answer.id: answer
+                for answer, previous_score in zip(answers, previous_scores)
+                if answer.correct != previous_score
+            }
+        )
+        graded_job_ids.append(job.id)
+
+        feedback_tasks.append(
+            generate_formative_feedback.s(
+                feedbacks,
+                questionnaire.content,
+                (
+                    recipient_emails_without_student + [job.student_email]
+                    if student_receive_email
+                    else recipient_emails_without_student
+                ),
+                questionnaire.title,
+                correct_count_answers,
+                questionnaire.subject.chat_settings.id,
+                job.student_email,
+                str(job.id),
+            )
+        )
+
+    if changed_answers:
+        save_correct_answers(list(changed_answers.values()))
+
+    now = timezone.now()
+    FeedbackJob.objects.filter(id__in=graded_job_ids).update(
+        stage=FeedbackJob.GRADED, updated_at=now
+    )
+    FeedbackJob.objects.filter(id__in=missing_job_ids).update(
+        stage=FeedbackJob.FAILED,
+        error="No answers found for this student in the questionnaire.",
+        finished_at=now,
+        updated_at=now,
+    )
+
+    if feedback_tasks:
+        chord(feedback_tasks)(summarize_feedback_resend.s(str(resend_job.id)))
+
+    return len(feedback_tasks)
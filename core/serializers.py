@@ -1,11 +1,13 @@
 from rest_framework import serializers
+from .models import FeedbackJob, ResendJob
 
 
 class ItemSerializer(serializers.Serializer):
-    question = serializers.CharField(max_length=1024)
+    item_id = serializers.UUIDField(required=False)
+    question = serializers.CharField(max_length=1024, required=False)
     answer = serializers.JSONField()
-    subcontent = serializers.CharField(max_length=1024)
-    correct_answer = serializers.JSONField()
+    subcontent = serializers.CharField(max_length=1024, required=False)
+    correct_answer = serializers.JSONField(required=False)
 
     def validate_answer(self, value):
         return self._validate_string_or_list(value, "answer")
@@ -13,6 +15,15 @@ class ItemSerializer(serializers.Serializer):
     def validate_correct_answer(self, value):
         return self._validate_string_or_list(value, "correct_answer")
 
+    def validate(self, attrs):
+        if "item_id" not in attrs and not all(
+            field in attrs for field in ("question", "subcontent", "correct_answer")
+        ):
+            raise serializers.ValidationError(
+                "item_id or question, subcontent and correct_answer must be provided."
+            )
+        return attrs
+
     def _validate_string_or_list(self, value, field_name):
         if isinstance(value, str):
             return [value]
@@ -24,6 +35,33 @@ class ItemSerializer(serializers.Serializer):
             )
 
 
+class QuestionnaireItemSerializer(serializers.Serializer):
+    question = serializers.CharField(max_length=1024)
+    subcontent = serializers.CharField(max_length=1024)
+    correct_answer = serializers.JSONField()
+
+    def validate_correct_answer(self, value):
+        if isinstance(value, str):
+            return [value]
+        elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+            return value
+        else:
+            raise serializers.ValidationError(
+                "correct_answer must be a string or a list of strings."
+            )
+
+
+class RegisterQuestionnaireSerializer(serializers.Serializer):
+    questionnaire_title = serializers.CharField(max_length=255)
+    questionnaire_content = serializers.CharField(max_length=1024)
+    questionnaire_external_id = serializers.CharField(max_length=255)
+    subject_code = serializers.CharField(max_length=255)
+    subject_name = serializers.CharField(max_length=255, required=False)
+    teacher_email = serializers.EmailField()
+    chat_id = serializers.UUIDField()
+    items = QuestionnaireItemSerializer(many=True, allow_empty=False)
+
+
 class SendFeedbackSerializer(serializers.Serializer):
     questionnaire_title = serializers.CharField(max_length=255)
     questionnaire_content = serializers.CharField(max_length=1024)
@@ -33,7 +71,23 @@ class SendFeedbackSerializer(serializers.Serializer):
     subject_name = serializers.CharField(max_length=255, required=False)
     teacher_email = serializers.EmailField()
     chat_id = serializers.UUIDField()
-    items = ItemSerializer(many=True)
+    items = ItemSerializer(many=True, allow_empty=False)
+
+
+class StudentSubmissionSerializer(serializers.Serializer):
+    student_email = serializers.EmailField()
+    items = ItemSerializer(many=True, allow_empty=False)
+
+
+class BulkSendFeedbackSerializer(serializers.Serializer):
+    questionnaire_title = serializers.CharField(max_length=255)
+    questionnaire_content = serializers.CharField(max_length=1024)
+    questionnaire_external_id = serializers.CharField(max_length=255)
+    subject_code = serializers.CharField(max_length=255)
+    subject_name = serializers.CharField(max_length=255, required=False)
+    teacher_email = serializers.EmailField()
+    chat_id = serializers.UUIDField()
+    submissions = StudentSubmissionSerializer(many=True, allow_empty=False)
 
 
 class ResendFeedbackSerializer(serializers.Serializer):
@@ -57,3 +111,74 @@ class ResendFeedbackSerializer(serializers.Serializer):
 
 class SendReportSerializer(serializers.Serializer):
     questionnaire_external_id = serializers.CharField(max_length=255)
+
+
+class QuestionnaireReportSerializer(serializers.Serializer):
+    report_format = serializers.ChoiceField(
+        choices=["csv", "xlsx", "parquet"], default="csv"
+    )
+    table = serializers.ChoiceField(
+        choices=["performance", "statistics"], default="performance"
+    )
+
+
+class FeedbackJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FeedbackJob
+        fields = ["id", "stage", "error", "created_at", "updated_at"]
+
+
+class StudentFeedbackJobSerializer(serializers.ModelSerializer):
+    duration = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FeedbackJob
+        fields = [
+            "id",
+            "student_email",
+            "stage",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "duration",
+        ]
+
+    def get_duration(self, obj):
+        if obj.started_at and obj.finished_at:
+            return (obj.finished_at - obj.started_at).total_seconds()
+        return None
+
+
+class ResendJobSerializer(serializers.ModelSerializer):
+    questionnaire_external_id = serializers.CharField(
+        source="questionnaire.external_id"
+    )
+    counts = serializers.SerializerMethodField()
+    completed = serializers.SerializerMethodField()
+    students = StudentFeedbackJobSerializer(
+        source="feedback_jobs", many=True, read_only=True
+    )
+
+    class Meta:
+        model = ResendJob
+        fields = [
+            "id",
+            "questionnaire_external_id",
+            "created_at",
+            "updated_at",
+            "counts",
+            "completed",
+            "students",
+        ]
+
+    def get_counts(self, obj):
+        counts = {stage: 0 for stage, _ in FeedbackJob.STAGE_CHOICES}
+        for job in obj.feedback_jobs.all():
+            counts[job.stage] += 1
+        return counts
+
+    def get_completed(self, obj):
+        return all(
+            job.stage in FeedbackJob.FINISHED_STAGES for job in obj.feedback_jobs.all()
+        )
@@ -0,0 +1,264 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import (
+    Answer,
+    ItemStatistics,
+    Questionnaire,
+    QuestionnaireStatistics,
+    Result,
+)
+import uuid
+
+HISTOGRAM_BUCKETS = 10
+SCORE_PRECISION = Decimal("0.01")
+STATISTICS_CHUNK_SIZE = 2000
+COUNT_FIELDS = ("correct_count", "partially_correct_count", "incorrect_count")
+
+ItemScores = Dict[Tuple[uuid.UUID, uuid.UUID], Decimal]
+
+
+def get_count_field(score: Decimal) -> str:
+    if score == 1:
+        return "correct_count"
+    elif score == 0:
+        return "incorrect_count"
+
+    return "partially_correct_count"
+
+
+def get_histogram_bucket(score: Decimal) -> int:
+    return min(int(score * HISTOGRAM_BUCKETS / 100), HISTOGRAM_BUCKETS - 1)
+
+
+def get_item_scores(
+    questionnaire: Questionnaire,
+    student_ids: Iterable[uuid.UUID],
+    item_ids: Iterable[uuid.UUID],
+) -> ItemScores:
+    return {
+        (student_id, item_id): correct
+        for student_id, item_id, correct in Answer.students.through.objects.filter(
+            answer__item__questionnaire=questionnaire,
+            answer__item_id__in=item_ids,
+            student_id__in=student_ids,
+        )
+        .order_by("answer__created_at")
+        .values_list("student_id", "answer__item_id", "answer__correct")
+    }
+
+
+def get_result_scores(
+    questionnaire: Questionnaire, student_ids: Iterable[uuid.UUID]
+) -> Dict[uuid.UUID, Decimal]:
+    scores = {}
+    for student_id, score in (
+        Result.objects.filter(questionnaire=questionnaire, student_id__in=student_ids)
+        .order_by("student_id", "-created_at")
+        .values_list("student_id", "score")
+    ):
+        scores.setdefault(student_id, score)
+
+    return scores
+
+
+def update_statistics(
+    questionnaire: Questionnaire,
+    previous_item_scores: ItemScores,
+    item_scores: ItemScores,
+    previous_scores: Dict[uuid.UUID, Decimal],
+    scores: Dict[uuid.UUID, Decimal],
+) -> None:
+    with transaction.atomic():
+        _, created = get_locked_questionnaire_statistics(questionnaire)
+        if created:
+            rebuild_statistics(questionnaire)
+            return
+
+        update_item_statistics(questionnaire, previous_item_scores, item_scores)
+        update_questionnaire_statistics(questionnaire, previous_scores, scores)
+
+
+def update_item_statistics(
+    questionnaire: Questionnaire,
+    previous_item_scores: ItemScores,
+    item_scores: ItemScores,
+) -> None:
+    deltas = {}
+    for (student_id, item_id), score in item_scores.items():
+        previous_score = previous_item_scores.get((student_id, item_id))
+        count_field = get_count_field(score)
+        previous_count_field = (
+            get_count_field(previous_score) if previous_score is not None else None
+        )
+        if count_field == previous_count_field:
+            continue
+
+        item_deltas = deltas.setdefault(item_id, dict.fromkeys(COUNT_FIELDS, 0))
+        item_deltas[count_field] += 1
+        if previous_count_field is not None:
+            item_deltas[previous_count_field] -= 1
+
+    if not deltas:
+        return
+
+    ItemStatistics.objects.bulk_create(
+        [
+            ItemStatistics(questionnaire=questionnaire, item_id=item_id)
+            for item_id in deltas
+        ],
+        ignore_conflicts=True,
+    )
+    ItemStatistics.objects.filter(item_id__in=deltas.keys()).update(
+        **{
+            count_field: F(count_field)
+            + Case(
+                *[
+                    When(item_id=item_id, then=Value(item_deltas[count_field]))
+                    for item_id, item_deltas in deltas.items()
+                    if item_deltas[count_field]
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for count_field in COUNT_FIELDS
+        }
+    )
+
+
+def update_questionnaire_statistics(
+    questionnaire: Questionnaire,
+    previous_scores: Dict[uuid.UUID, Decimal],
+    scores: Dict[uuid.UUID, Decimal],
+) -> None:
+    if not scores:
+        return
+
+    questionnaire_statistics, _ = get_locked_questionnaire_statistics(questionnaire)
+    histogram = questionnaire_statistics.histogram
+
+    for student_id, score in scores.items():
+        score = Decimal(score).quantize(SCORE_PRECISION)
+        previous_score = previous_scores.get(student_id)
+
+        if previous_score is None:
+            questionnaire_statistics.student_count += 1
+        else:
+            histogram[get_histogram_bucket(previous_score)] -= 1
+            questionnaire_statistics.score_sum -= previous_score
+
+        histogram[get_histogram_bucket(score)] += 1
+        questionnaire_statistics.score_sum += score
+
+    questionnaire_statistics.save()
+
+
+def get_locked_questionnaire_statistics(
+    questionnaire: Questionnaire,
+) -> Tuple[QuestionnaireStatistics, bool]:
+    return QuestionnaireStatistics.objects.select_for_update().get_or_create(
+        questionnaire=questionnaire,
+        defaults={"histogram": [0] * HISTOGRAM_BUCKETS},
+    )
+
+
+def rebuild_statistics(questionnaire: Questionnaire) -> Dict[str, int]:
+    item_ids = list(questionnaire.items.values_list("id", flat=True))
+    counts = {item_id: dict.fromkeys(COUNT_FIELDS, 0) for item_id in item_ids}
+
+    latest_scores = {}
+    current_student_id = None
+    for student_id, item_id, correct in (
+        Answer.students.through.objects.filter(
+            answer__item__questionnaire=questionnaire,
+            student__questionnaires=questionnaire,
+        )
+        .order_by("student_id", "answer__created_at")
+        .values_list("student_id", "answer__item_id", "answer__correct")
+        .iterator(chunk_size=STATISTICS_CHUNK_SIZE)
+    ):
+        if student_id != current_student_id:
+            count_item_scores(counts, latest_scores)
+            current_student_id = student_id
+            latest_scores = {}
+
+        latest_scores[item_id] = correct
+
+    count_item_scores(counts, latest_scores)
+
+    histogram = [0] * HISTOGRAM_BUCKETS
+    student_count = 0
+    score_sum = Decimal(0)
+    scores = get_result_scores(questionnaire, questionnaire.students.values("id"))
+    for score in scores.values():
+        histogram[get_histogram_bucket(score)] += 1
+        student_count += 1
+        score_sum += score
+
+    with transaction.atomic():
+        questionnaire_statistics, _ = get_locked_questionnaire_statistics(questionnaire)
+        questionnaire_statistics.student_count = student_count
+        questionnaire_statistics.score_sum = score_sum
+        questionnaire_statistics.histogram = histogram
+        questionnaire_statistics.save()
+
+        ItemStatistics.objects.filter(questionnaire=questionnaire).delete()
+        ItemStatistics.objects.bulk_create(
+            [
+                ItemStatistics(
+                    questionnaire=questionnaire, item_id=item_id, **item_counts
+                )
+                for item_id, item_counts in counts.items()
+            ]
+        )
+
+    return {"items": len(counts), "students": student_count}
+
+
+def count_item_scores(
+    counts: Dict[uuid.UUID, Dict[str, int]], item_scores: Dict[uuid.UUID, Decimal]
+) -> None:
+    for item_id, score in item_scores.items():
+        counts[item_id][get_count_field(score)] += 1
+
+
+def get_question_stats(
+    questionnaire: Questionnaire, items: List[Tuple[uuid.UUID, str]]
+) -> Tuple[int, List[Tuple[str, int, int, int]]]:
+    if not QuestionnaireStatistics.objects.filter(questionnaire=questionnaire).exists():
+        rebuild_statistics(questionnaire)
+
+    statistics = {
+        item_statistics.item_id: item_statistics
+        for item_statistics in ItemStatistics.objects.filter(
+            questionnaire=questionnaire
+        )
+    }
+    total_count = questionnaire.students.count()
+
+    question_stats = []
+    for item_id, question in items:
+        item_statistics: Optional[ItemStatistics] = statistics.get(item_id)
+        correct_count, partially_correct_count, incorrect_count = (
+            (
+                item_statistics.correct_count,
+                item_statistics.partially_correct_count,
+                item_statistics.incorrect_count,
+            )
+            if item_statistics
+            else (0, 0, 0)
+        )
+        unanswered_count = max(
+            total_count - correct_count - partially_correct_count - incorrect_count, 0
+        )
+        question_stats.append(
+            (
+                question,
+                correct_count,
+                partially_correct_count,
+                incorrect_count + unanswered_count,
+            )
+        )
+
+    return total_count, question_stats
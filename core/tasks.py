@@ -1,33 +1,57 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Tuple, Union
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from celery import shared_task
+from django.conf import settings
+from django.db.models import Count, Q
 from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
-from weasyprint import HTML
-from .models import Answer, ChatSettings
-from openai import OpenAI
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from .models import Answer, ChatSettings, FeedbackJob, Item, Questionnaire
+from .cache import feedback_cache
+from .clients import get_openai_client
+from .rate_limit import RateLimiter, backoff_delay, estimate_tokens, get_retry_after
+from .clustering import cluster_texts, normalize_text
+from .exceptions import FeedbackPendingException
+from .mailer import is_transient_smtp_error, mailer
+from .ingestion import ingest_submission
+from .rendering import render_feedback_pdf
+from .reports import write_report_workbook
+from .utils import (
+    check_answers,
+    grade_answers,
+    normalize_answers,
+    regrade_item,
+    start_feedback_job,
+    update_feedback_job,
+)
+import json
+import logging
 import os
+import time
+import uuid
 
+logger = logging.getLogger(__name__)
 
-@shared_task
+
+@shared_task(acks_late=True)
 def send_formative_feedback_email(
     email: List[str],
     questionnaire_title: str,
     feedbacks: List[Dict[str, Union[str, bool, int]]],
     correct_count_answers: int,
     student_email: str,
+    job_id: Optional[str] = None,
 ) -> None:
     try:
-        html_string = render_to_string(
-            "feedback_template.html",
+        pdf_file = render_feedback_pdf(
             {
                 "questionnaire_title": questionnaire_title,
                 "feedbacks": feedbacks,
                 "correct_count_answers": correct_count_answers,
                 "student_email": student_email,
-            },
+            }
         )
-        html = HTML(string=html_string)
-        pdf_file = html.write_pdf()
+        update_feedback_job(job_id, FeedbackJob.RENDERED)
 
         email_message = EmailMessage(
             f"Feedback Formativo - {questionnaire_title}",
@@ -36,30 +60,89 @@ def send_formative_feedback_email(
             email,
         )
         email_message.attach("formative_feedback.pdf", pdf_file, "application/pdf")
-        email_message.send()
+        mailer.send(email_message)
+
+        pending_count = sum(1 for feedback in feedbacks if feedback.get("pending"))
+        if pending_count:
+            update_feedback_job(
+                job_id, FeedbackJob.PARTIAL, f"{pending_count} feedback items pending."
+            )
+        else:
+            update_feedback_job(job_id, FeedbackJob.EMAILED)
 
     except Exception as e:
-        print(f"Error sending feedback email: {str(e)}")
+        logger.exception("Error sending feedback email for job %s", job_id)
+        update_feedback_job(job_id, FeedbackJob.FAILED, str(e))
 
 
-@shared_task
-def send_email_with_report(subject, body, recipient_emails, report_file):
-    email = EmailMessage(
-        subject,
-        body,
-        os.getenv("EMAIL_HOST_USER", ""),
-        to=recipient_emails,
-    )
-    email.attach(
-        "relatorio.xlsx",
-        report_file,
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    email.send()
+@shared_task(bind=True, acks_late=True, max_retries=settings.EMAIL_MAX_RETRIES)
+def send_email_with_report(self, subject, body, recipient_emails, report_path):
+    try:
+        email = EmailMessage(
+            subject,
+            body,
+            os.getenv("EMAIL_HOST_USER", ""),
+            to=recipient_emails,
+        )
+        with open(report_path, "rb") as report_file:
+            email.attach(
+                "relatorio.xlsx",
+                report_file.read(),
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        mailer.send(email)
+
+    except Exception as e:
+        if is_transient_smtp_error(e) and self.request.retries < self.max_retries:
+            logger.warning("Retrying report email %s: %s", report_path, e)
+            raise self.retry(
+                exc=e,
+                countdown=settings.EMAIL_RETRY_BACKOFF * 2**self.request.retries,
+            )
+
+        logger.exception("Error sending report email %s", report_path)
+        raise
+
+    os.remove(report_path)
 
 
 @shared_task
+def send_questionnaire_report(questionnaire_id: str, recipient_emails: List[str]):
+    try:
+        questionnaire = Questionnaire.objects.get(id=questionnaire_id)
+
+        os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+        report_path = write_report_workbook(
+            questionnaire,
+            os.path.join(
+                settings.REPORTS_DIR,
+                f"relatorio-{questionnaire.id}-{uuid.uuid4()}.xlsx",
+            ),
+        )
+
+        send_email_with_report.delay(
+            f"Relatório do Questionário {questionnaire.title}",
+            "Segue em anexo o relatório do questionário.",
+            recipient_emails,
+            report_path,
+        )
+
+    except Exception:
+        logger.exception(
+            "Error generating report for questionnaire %s", questionnaire_id
+        )
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(FeedbackPendingException,),
+    max_retries=settings.FEEDBACK_GENERATION_MAX_RETRIES,
+    retry_backoff=settings.FEEDBACK_GENERATION_RETRY_BACKOFF,
+    retry_backoff_max=settings.FEEDBACK_GENERATION_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+)
 def generate_formative_feedback(
+    self,
     feedbacks: List[Dict[str, Union[str, bool, int]]],
     questionnaire_content: str,
     email: List[str],
@@ -67,23 +150,197 @@ def generate_formative_feedback(
     correct_count_answers: int,
     chat_settings_id: str,
     student_email: str,
-) -> None:
+    job_id: Optional[str] = None,
+) -> bool:
     try:
+        if not self.request.retries:
+            start_feedback_job(job_id)
         chat_settings = ChatSettings.objects.get(id=chat_settings_id)
-        detailed_feedbacks = generate_feedback_details(
-            feedbacks, questionnaire_content, chat_settings
-        )
+        load_feedback_checkpoints(feedbacks)
+
+        try:
+            generate_feedback_details(feedbacks, questionnaire_content, chat_settings)
+        except FeedbackPendingException as e:
+            if self.request.retries < self.max_retries:
+                raise
+
+            logger.warning(
+                "Sending formative feedback for job %s with pending items: %s",
+                job_id,
+                e,
+            )
+
+        for feedback in feedbacks:
+            feedback["pending"] = is_feedback_pending(feedback)
+        update_feedback_job(job_id, FeedbackJob.GENERATED)
 
         send_formative_feedback_email.delay(
             email,
             questionnaire_title,
-            detailed_feedbacks,
+            feedbacks,
+            correct_count_answers,
+            student_email,
+            job_id,
+        )
+
+        return True
+
+    except FeedbackPendingException:
+        raise
+
+    except Exception as e:
+        logger.exception("Error generating formative feedback for job %s", job_id)
+        update_feedback_job(job_id, FeedbackJob.FAILED, str(e))
+
+        return False
+
+
+def load_feedback_checkpoints(
+    feedbacks: List[Dict[str, Union[str, bool, int]]],
+) -> None:
+    checkpoints = {
+        str(answer_id): (explanation, improve_suggestions)
+        for answer_id, explanation, improve_suggestions in Answer.objects.filter(
+            id__in=[
+                feedback["answer_id"]
+                for feedback in feedbacks
+                if is_feedback_pending(feedback)
+            ]
+        ).values_list("id", "feedback_explanation", "feedback_improve_suggestions")
+    }
+
+    for feedback in feedbacks:
+        checkpoint = checkpoints.get(str(feedback["answer_id"]))
+        if checkpoint and all(checkpoint):
+            feedback["explanation"], feedback["improve_suggestions"] = checkpoint
+
+
+@shared_task
+def summarize_feedback_resend(results: List[bool], resend_job_id: str) -> dict:
+    summary = dict(
+        FeedbackJob.objects.filter(resend_job_id=resend_job_id)
+        .values("stage")
+        .annotate(count=Count("id"))
+        .values_list("stage", "count")
+    )
+    summary["dispatched"] = len(results)
+    logger.info("Resent feedback for resend job %s: %s", resend_job_id, summary)
+
+    return summary
+
+
+@shared_task
+def process_feedback_job(job_id: str) -> None:
+    try:
+        job = FeedbackJob.objects.get(id=job_id)
+        (
+            questionnaire,
+            chat_settings,
+            feedbacks,
+            correct_count_answers,
+        ) = ingest_submission(job.payload, job_id)
+
+        student_email = job.payload.get("student_email")
+        generate_formative_feedback.delay(
+            feedbacks,
+            job.payload.get("questionnaire_content"),
+            [student_email],
+            questionnaire.title,
             correct_count_answers,
+            chat_settings.id,
             student_email,
+            job_id,
         )
 
     except Exception as e:
-        print(f"Error generating formative feedback: {str(e)}")
+        logger.exception("Error processing feedback job %s", job_id)
+        update_feedback_job(job_id, FeedbackJob.FAILED, str(e))
+
+
+@shared_task
+def regrade_item_answers(item_id: str) -> Dict[str, int]:
+    try:
+        item = Item.objects.get(id=item_id)
+        report = regrade_item(item)
+        logger.info("Regraded item %s: %s", item_id, report)
+
+        return report
+
+    except Exception:
+        logger.exception("Error regrading item %s", item_id)
+
+
+def cluster_and_generate_feedback(
+    questionnaire: Questionnaire,
+    chat_settings: ChatSettings,
+    threshold: float,
+) -> Dict[str, int]:
+    answers = list(
+        Answer.objects.filter(item__questionnaire=questionnaire, correct__lt=1)
+        .filter(Q(feedback_explanation__isnull=True) | Q(feedback_explanation=""))
+        .select_related("item")
+        .annotate(student_count=Count("students"))
+        .order_by("item_id", "-student_count", "created_at")
+    )
+
+    feedbacks, _ = grade_answers(answers)
+
+    partitions = defaultdict(list)
+    for answer, feedback in zip(answers, feedbacks):
+        partitions[get_cluster_partition(answer, feedback)].append((answer, feedback))
+
+    representatives = []
+    cluster_members = []
+    for partition in partitions.values():
+        for cluster in cluster_texts(
+            [answer.text for answer, _ in partition], threshold
+        ):
+            representatives.append(partition[cluster[0]][1])
+            cluster_members.append([partition[index][0] for index in cluster[1:]])
+
+    try:
+        generate_feedback_details(representatives, questionnaire.content, chat_settings)
+    finally:
+        reuse_cluster_feedback(representatives, cluster_members)
+
+    return {
+        "items": len({answer.item_id for answer in answers}),
+        "answers": len(answers),
+        "clusters": len(representatives),
+        "completions_saved": len(answers) - len(representatives),
+    }
+
+
+def get_cluster_partition(
+    answer: Answer, feedback: Dict[str, Union[str, bool, int]]
+) -> tuple:
+    if len(feedback["correct_answer"]) <= 1:
+        return (answer.item_id, feedback["score"])
+
+    return (
+        answer.item_id,
+        feedback["score"],
+        frozenset(normalize_text(text) for text in feedback["wrong_answers"]),
+    )
+
+
+def reuse_cluster_feedback(
+    representatives: List[Dict[str, Union[str, bool, int]]],
+    cluster_members: List[List[Answer]],
+) -> None:
+    reused_answers = []
+    for feedback, members in zip(representatives, cluster_members):
+        if is_feedback_pending(feedback):
+            continue
+
+        for answer in members:
+            answer.feedback_explanation = feedback["explanation"]
+            answer.feedback_improve_suggestions = feedback["improve_suggestions"]
+            reused_answers.append(answer)
+
+    Answer.objects.bulk_update(
+        reused_answers, ["feedback_explanation", "feedback_improve_suggestions"]
+    )
 
 
 def generate_feedback_details(
@@ -91,46 +348,188 @@ def generate_feedback_details(
     questionnaire_content: str,
     chat_settings: ChatSettings,
 ) -> List[Dict[str, Union[str, bool, int]]]:
-    detailed_feedbacks = []
+    pending_feedbacks = []
 
     for feedback in feedbacks:
-        if (
-            not (feedback["explanation"] and feedback["improve_suggestions"])
-            and not feedback["correct"]
-        ):
-            simple_prompt = True
-            if len(feedback["answer"]) > 1 or len(feedback["correct_answer"]) > 1:
-                prompt = create_prompt_multiple_answers(
-                    feedback,
-                    questionnaire_content,
-                    chat_settings.max_tokens,
-                )
-                simple_prompt = False
-            else:
-                prompt = create_prompt(
-                    feedback,
-                    questionnaire_content,
-                    chat_settings.max_tokens,
-                )
+        if not is_feedback_pending(feedback):
+            continue
 
-            feedback_text = generate_openai_feedback(
-                chat_settings, prompt, simple_prompt
+        cache_key = get_feedback_cache_key(
+            feedback, questionnaire_content, chat_settings
+        )
+        cached_feedback = feedback_cache.get(cache_key) if cache_key else None
+
+        if cached_feedback:
+            apply_feedback(feedback, *cached_feedback)
+        else:
+            pending_feedbacks.append((feedback, cache_key))
+
+    if pending_feedbacks and chat_settings.batch_prompts:
+        pending_feedbacks = generate_batched_feedback_details(
+            pending_feedbacks, questionnaire_content, chat_settings
+        )
+
+    if pending_feedbacks:
+        prompts = [
+            build_feedback_prompt(
+                feedback, questionnaire_content, chat_settings.max_tokens
             )
+            for feedback, _ in pending_feedbacks
+        ]
+
+        errors = []
+        with ThreadPoolExecutor(
+            max_workers=get_max_workers(chat_settings, len(prompts))
+        ) as executor:
+            futures = {
+                executor.submit(generate_openai_feedback, chat_settings, *prompt): (
+                    pending_feedback
+                )
+                for prompt, pending_feedback in zip(prompts, pending_feedbacks)
+            }
 
-            (
-                feedback["explanation"],
-                feedback["improve_suggestions"],
-            ) = format_feedback(feedback_text)
+            for future in as_completed(futures):
+                feedback, cache_key = futures[future]
+                try:
+                    feedback_text = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
 
-            save_feedback_to_answer(
-                feedback["answer_id"],
-                feedback["explanation"],
-                feedback["improve_suggestions"],
+                apply_feedback(feedback, *format_feedback(feedback_text), cache_key)
+
+        if errors:
+            raise FeedbackPendingException(len(errors), errors[0])
+
+    return feedbacks
+
+
+def generate_batched_feedback_details(
+    pending_feedbacks: List[Tuple[Dict[str, Union[str, bool, int]], Optional[str]]],
+    questionnaire_content: str,
+    chat_settings: ChatSettings,
+) -> List[Tuple[Dict[str, Union[str, bool, int]], Optional[str]]]:
+    batch_size = get_batch_size(chat_settings)
+    batches = [
+        pending_feedbacks[index : index + batch_size]
+        for index in range(0, len(pending_feedbacks), batch_size)
+    ]
+
+    def generate_batch(batch):
+        if len(batch) == 1:
+            return None
+
+        batch_feedbacks = [feedback for feedback, _ in batch]
+        simple_prompt = all(
+            len(feedback["answer"]) == 1 and len(feedback["correct_answer"]) == 1
+            for feedback in batch_feedbacks
+        )
+        try:
+            feedback_text = generate_openai_batch_feedback(
+                chat_settings,
+                create_batch_prompt(
+                    batch_feedbacks, questionnaire_content, chat_settings.max_tokens
+                ),
+                simple_prompt,
+                len(batch_feedbacks),
             )
+        except Exception as e:
+            logger.warning("Error generating batched feedback: %s", e)
+            return None
+
+        return parse_batch_feedback(feedback_text, len(batch_feedbacks))
+
+    with ThreadPoolExecutor(
+        max_workers=get_max_workers(chat_settings, len(batches))
+    ) as executor:
+        batch_results = list(executor.map(generate_batch, batches))
+
+    fallback_feedbacks = []
+    for batch, batch_result in zip(batches, batch_results):
+        if batch_result is None:
+            fallback_feedbacks.extend(batch)
+            continue
+
+        for (feedback, cache_key), (explanation, improve_suggestions) in zip(
+            batch, batch_result
+        ):
+            apply_feedback(feedback, explanation, improve_suggestions, cache_key)
+
+    return fallback_feedbacks
+
+
+def apply_feedback(
+    feedback: Dict[str, Union[str, bool, int]],
+    explanation: str,
+    improve_suggestions: str,
+    cache_key: Optional[str] = None,
+) -> None:
+    feedback["explanation"] = explanation
+    feedback["improve_suggestions"] = improve_suggestions
+
+    save_feedback_to_answer(
+        feedback["answer_id"],
+        feedback["explanation"],
+        feedback["improve_suggestions"],
+    )
+
+    if cache_key:
+        feedback_cache.set(
+            cache_key,
+            feedback["explanation"],
+            feedback["improve_suggestions"],
+        )
+
+
+def get_max_workers(chat_settings: ChatSettings, task_count: int) -> int:
+    return max(min(chat_settings.max_concurrent_requests, task_count), 1)
+
 
-        detailed_feedbacks.append(feedback)
+def is_feedback_pending(feedback: Dict[str, Union[str, bool, int]]) -> bool:
+    return not feedback["explanation"] and not feedback["correct"]
 
-    return detailed_feedbacks
+
+def get_feedback_cache_key(
+    feedback: Dict[str, Union[str, bool, int]],
+    questionnaire_content: str,
+    chat_settings: ChatSettings,
+) -> Optional[str]:
+    if not feedback.get("item_id"):
+        return None
+
+    normalized_feedback = {
+        **feedback,
+        "answer": normalize_answers(feedback["answer"]),
+        "wrong_answers": normalize_answers(feedback.get("wrong_answers") or []),
+        "result": {
+            normalize_answers([answer])[0]: correct
+            for answer, correct in feedback.get("result", {}).items()
+        },
+    }
+    prompt, simple_prompt = build_feedback_prompt(
+        normalized_feedback, questionnaire_content, chat_settings.max_tokens
+    )
+
+    return feedback_cache.make_key(
+        str(feedback["item_id"]),
+        feedback["answer"],
+        chat_settings.principal_model if simple_prompt else chat_settings.special_model,
+        f"{chat_settings.system_content_instructions}\n{prompt}",
+    )
+
+
+def build_feedback_prompt(
+    feedback: Dict[str, Union[str, bool, int]],
+    questionnaire_content: str,
+    max_tokens: int,
+) -> Tuple[str, bool]:
+    if len(feedback["answer"]) > 1 or len(feedback["correct_answer"]) > 1:
+        return (
+            create_prompt_multiple_answers(feedback, questionnaire_content, max_tokens),
+            False,
+        )
+
+    return create_prompt(feedback, questionnaire_content, max_tokens), True
 
 
 def format_feedback(
@@ -215,45 +614,190 @@ def create_prompt_multiple_answers(
     )
 
 
+def create_batch_prompt(
+    feedbacks: List[Dict[str, Union[str, bool, int]]],
+    questionnaire_content: str,
+    max_tokens: int,
+) -> str:
+    questions = []
+
+    for index, feedback in enumerate(feedbacks, start=1):
+        student_answers = "\n".join(
+            f"- {answer} ({'certa' if correct else 'errada'})"
+            for answer, correct in feedback["result"].items()
+        )
+        questions.append(
+            f"ID: {index}\n"
+            f"Questão: {feedback['question']}\n"
+            f"Respostas do aluno:\n{student_answers}\n"
+            f"Gabarito: {', '.join(feedback['correct_answer'])}\n"
+            f"Subconteúdo da questão: {feedback['subcontent']}"
+        )
+
+    questions = "\n\n".join(questions)
+
+    return (
+        f"Conteúdo do questionário: {questionnaire_content}\n"
+        "A seguir estão as questões que o aluno não acertou completamente.\n\n"
+        f"{questions}\n\n"
+        "Para cada questão, explique por que as respostas do aluno estão incorretas ou incompletas e qual deveria ser a resposta certa, "
+        "e sugira o que o aluno pode estudar para melhorar nesse assunto.\n"
+        'Responda somente com um objeto JSON no formato {"feedbacks": [{"id": <ID da questão>, "explanation": "<explicação>", "improve_suggestions": "<sugestões de aperfeiçoamento>"}]}, com um elemento para cada questão.\n'
+        "Por favor, escreva os textos sem usar qualquer formatação como negrito, itálico ou sublinhado e sem usar tópicos, como * ou -.\n"
+        f"Limite cada questão a {(max_tokens - 50) if max_tokens > 100 else max_tokens} tokens, responda sem exceder esse limite."
+    )
+
+
+def parse_batch_feedback(
+    feedback_text: str, feedback_count: int
+) -> Optional[List[Tuple[str, str]]]:
+    try:
+        response = json.loads(feedback_text)
+        feedbacks_by_id = {
+            str(feedback["id"]): (
+                feedback["explanation"],
+                feedback["improve_suggestions"],
+            )
+            for feedback in response["feedbacks"]
+        }
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    parsed_feedbacks = []
+    for index in range(1, feedback_count + 1):
+        feedback = feedbacks_by_id.get(str(index))
+        if not feedback or not all(
+            isinstance(text, str) and text.strip() for text in feedback
+        ):
+            return None
+        parsed_feedbacks.append(tuple(text.strip() for text in feedback))
+
+    return parsed_feedbacks
+
+
 def generate_openai_feedback(
     chat_settings: ChatSettings,
     prompt: str,
     simple_prompt: bool,
 ) -> str:
-    client = OpenAI(api_key=chat_settings.openai_api_key)
-
-    response = client.chat.completions.create(
-        model=(
+    return request_openai_completion(
+        chat_settings,
+        prompt,
+        (
             chat_settings.principal_model
             if simple_prompt
             else chat_settings.special_model
         ),
-        messages=[
-            {
-                "role": "system",
-                "content": chat_settings.system_content_instructions,
-            },
-            {
-                "role": "user",
-                "content": prompt,
-            },
-        ],
-        temperature=float(chat_settings.temperature),
-        max_tokens=chat_settings.max_tokens,
-        top_p=float(chat_settings.top_p),
-        frequency_penalty=float(chat_settings.frequency_penalty),
-        presence_penalty=float(chat_settings.presence_penalty),
+        chat_settings.max_tokens,
+    )
+
+
+def generate_openai_batch_feedback(
+    chat_settings: ChatSettings,
+    prompt: str,
+    simple_prompt: bool,
+    feedback_count: int,
+) -> str:
+    model = (
+        chat_settings.principal_model if simple_prompt else chat_settings.special_model
+    )
+    options = (
+        {"response_format": {"type": "json_object"}}
+        if model in settings.JSON_MODE_MODELS
+        else {}
+    )
+
+    return request_openai_completion(
+        chat_settings,
+        prompt,
+        model,
+        min(chat_settings.max_tokens * feedback_count, get_max_output_tokens(model)),
+        **options,
+    )
+
+
+def get_max_output_tokens(model: str) -> int:
+    return settings.MODEL_MAX_OUTPUT_TOKENS.get(
+        model, settings.DEFAULT_MODEL_MAX_OUTPUT_TOKENS
     )
 
-    message = response.choices[0].message.content
 
-    return message
+def get_batch_size(chat_settings: ChatSettings) -> int:
+    max_output_tokens = min(
+        get_max_output_tokens(chat_settings.principal_model),
+        get_max_output_tokens(chat_settings.special_model),
+    )
+
+    return max(
+        min(
+            chat_settings.batch_size,
+            max_output_tokens // max(chat_settings.max_tokens, 1),
+        ),
+        1,
+    )
+
+
+def request_openai_completion(
+    chat_settings: ChatSettings,
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    **options,
+) -> str:
+    client = get_openai_client(chat_settings)
+    rate_limiter = RateLimiter.for_chat_settings(chat_settings)
+    estimated_tokens = (
+        estimate_tokens(chat_settings.system_content_instructions + prompt) + max_tokens
+    )
+
+    for attempt in range(settings.OPENAI_MAX_RETRIES + 1):
+        rate_limiter.acquire(estimated_tokens)
+
+        try:
+            raw_response = client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": chat_settings.system_content_instructions,
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt,
+                    },
+                ],
+                temperature=float(chat_settings.temperature),
+                max_tokens=max_tokens,
+                top_p=float(chat_settings.top_p),
+                frequency_penalty=float(chat_settings.frequency_penalty),
+                presence_penalty=float(chat_settings.presence_penalty),
+                **options,
+            )
+        except RateLimitError as e:
+            retry_after = get_retry_after(e.response.headers)
+            rate_limiter.cooldown(retry_after)
+            if attempt == settings.OPENAI_MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt, retry_after))
+            continue
+        except (APIConnectionError, InternalServerError):
+            if attempt == settings.OPENAI_MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        rate_limiter.update_from_headers(raw_response.headers)
+        response = raw_response.parse()
+
+        message = response.choices[0].message.content
+
+        return message
 
 
 def save_feedback_to_answer(
     answer_id: int, feedback_explanation: str, feedback_improve_suggestions: str
 ) -> None:
-    answer = Answer.objects.get(id=answer_id)
-    answer.feedback_explanation = feedback_explanation
-    answer.feedback_improve_suggestions = feedback_improve_suggestions
-    answer.save()
+    Answer.objects.filter(id=answer_id).update(
+        feedback_explanation=feedback_explanation,
+        feedback_improve_suggestions=feedback_improve_suggestions,
+    )
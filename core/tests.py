@@ -1,3 +1,1635 @@
-from django.test import TestCase
+from unittest import mock
+from decimal import Decimal
+from io import BytesIO, StringIO
+import json
+import os
+import redis
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from openpyxl import load_workbook
+from . import rendering
+from .cache import FeedbackCache, LocalLRUCache, PDFCache
+from .clients import get_openai_client, invalidate_openai_client
+from .exceptions import FeedbackPendingException
+from .hashing import hash_answer_text, hash_question
+from .mailer import Mailer
+from .models import (
+    Answer,
+    ChatSettings,
+    FeedbackJob,
+    Item,
+    ItemStatistics,
+    Questionnaire,
+    QuestionnaireStatistics,
+    ResendJob,
+    Result,
+    Student,
+    Subject,
+)
+from .reports import iter_report_table
+from .rate_limit import RateLimiter, get_retry_after, parse_duration
+from .resend import retry_feedback_resend, start_feedback_resend
+from .stats import rebuild_statistics
+from .tasks import (
+    cluster_and_generate_feedback,
+    generate_feedback_details,
+    generate_formative_feedback,
+    generate_openai_batch_feedback,
+    get_batch_size,
+    send_email_with_report,
+    send_formative_feedback_email,
+    send_questionnaire_report,
+)
+from .utils import (
+    calculate_score,
+    check_answers,
+    grade_questionnaire,
+    regrade_item,
+    update_feedback_job,
+)
 
-# Create your tests here.
+
+def create_chat_settings(**kwargs) -> ChatSettings:
+    return ChatSettings.objects.create(
+        **{
+            "openai_api_key": "test-key",
+            "principal_model": "gpt-4o",
+            "special_model": "gpt-4o",
+            "system_content_instructions": "Instructions",
+            "max_tokens": 300,
+            "temperature": 1,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0,
+            **kwargs,
+        }
+    )
+
+
+def create_questionnaire(
+    chat_settings: ChatSettings, suffix: str = ""
+) -> Questionnaire:
+    subject = Subject.objects.create(
+        code=f"subject{suffix}", name="Subject", chat_settings=chat_settings
+    )
+
+    return Questionnaire.objects.create(
+        title="Questionnaire",
+        content="Content",
+        external_id=f"questionnaire{suffix}",
+        subject=subject,
+    )
+
+
+def create_wrong_feedbacks(questionnaire: Questionnaire, count: int) -> list:
+    answers = []
+    for index in range(count):
+        item = Item.objects.create(
+            questionnaire=questionnaire,
+            question=f"Question {index}",
+            subcontent="Subcontent",
+            correct_answer=["A"],
+        )
+        answers.append(Answer.objects.create(item=item, text="B"))
+
+    feedbacks, _ = check_answers(answers)
+
+    return feedbacks
+
+
+class SendFeedbackViewTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _payload(self, suffix: str, item_count: int) -> dict:
+        return {
+            "questionnaire_title": f"Questionnaire {suffix}",
+            "questionnaire_content": "Content",
+            "questionnaire_external_id": f"questionnaire-{suffix}",
+            "student_email": f"student-{suffix}@example.com",
+            "subject_code": f"subject-{suffix}",
+            "subject_name": "Subject",
+            "teacher_email": f"teacher-{suffix}@example.com",
+            "chat_id": str(self.chat_settings.id),
+            "items": [
+                {
+                    "question": f"Question {index}",
+                    "answer": "A" if index % 2 else "B",
+                    "subcontent": "Subcontent",
+                    "correct_answer": "A",
+                }
+                for index in range(item_count)
+            ],
+        }
+
+    def _post(self, payload: dict) -> int:
+        with mock.patch(
+            "core.views.generate_formative_feedback.delay"
+        ), CaptureQueriesContext(connection) as context:
+            response = self.client.post("/core/send-feedback/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_depend_on_item_count(self):
+        self.assertEqual(
+            self._post(self._payload("small", 1)),
+            self._post(self._payload("large", 20)),
+        )
+
+    def test_rejects_submission_without_items(self):
+        response = self.client.post(
+            "/core/send-feedback/", self._payload("empty", 0), format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("items", response.data)
+
+    def test_saves_scores_and_result(self):
+        self._post(self._payload("scores", 4))
+
+        self.assertEqual(
+            sorted(Answer.objects.values_list("correct", flat=True)), [0, 0, 1, 1]
+        )
+        self.assertEqual(Result.objects.get().score, 50)
+
+
+class BulkSendFeedbackViewTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _payload(self, suffix: str, student_count: int) -> dict:
+        return {
+            "questionnaire_title": f"Questionnaire {suffix}",
+            "questionnaire_content": "Content",
+            "questionnaire_external_id": f"questionnaire-{suffix}",
+            "subject_code": f"subject-{suffix}",
+            "subject_name": "Subject",
+            "teacher_email": f"teacher-{suffix}@example.com",
+            "chat_id": str(self.chat_settings.id),
+            "submissions": [
+                {
+                    "student_email": f"student-{suffix}-{student}@example.com",
+                    "items": [
+                        {
+                            "question": f"Question {index}",
+                            "answer": "A" if (student + index) % 2 else "B",
+                            "subcontent": "Subcontent",
+                            "correct_answer": "A",
+                        }
+                        for index in range(3)
+                    ],
+                }
+                for student in range(student_count)
+            ],
+        }
+
+    def _post(self, payload: dict):
+        with mock.patch("core.views.group") as group, self.captureOnCommitCallbacks(
+            execute=True
+        ) as callbacks:
+            response = self.client.post(
+                "/core/send-feedback/bulk/", payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(callbacks), 1)
+        group.return_value.apply_async.assert_called_once()
+
+        return group.call_args[0][0]
+
+    def test_query_count_does_not_depend_on_student_count(self):
+        with CaptureQueriesContext(connection) as context:
+            self._post(self._payload("small", 2))
+
+        with self.assertNumQueries(len(context.captured_queries)):
+            self._post(self._payload("large", 10))
+
+    def test_dispatches_one_feedback_task_per_student_on_commit(self):
+        tasks = self._post(self._payload("class", 3))
+
+        self.assertEqual(
+            [task.args[2] for task in tasks],
+            [[f"student-class-{student}@example.com"] for student in range(3)],
+        )
+        self.assertEqual(Result.objects.count(), 3)
+        self.assertEqual(
+            sorted(Result.objects.values_list("score", flat=True)),
+            [Decimal("33.33"), Decimal("33.33"), Decimal("66.67")],
+        )
+
+
+class ClusterFeedbackTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.questionnaire = create_questionnaire(self.chat_settings)
+        self.item = Item.objects.create(
+            questionnaire=self.questionnaire,
+            question="Question",
+            subcontent="Subcontent",
+            correct_answer=["Alternative A", "Alternative B"],
+        )
+
+    def _create_answer(self, text: list) -> Answer:
+        return Answer.objects.create(item=self.item, text=text)
+
+    def _cluster(self, generate_feedback) -> None:
+        with mock.patch("core.tasks.feedback_cache") as cache, mock.patch(
+            "core.tasks.generate_openai_feedback", side_effect=generate_feedback
+        ):
+            cache.get.return_value = None
+            cluster_and_generate_feedback(self.questionnaire, self.chat_settings, 0.5)
+
+    def test_does_not_share_feedback_between_different_wrong_answers(self):
+        first = self._create_answer(["Alternative A", "Alternative C"])
+        duplicate = self._create_answer(["Alternative A", "alternative C."])
+        other = self._create_answer(["Alternative A", "Alternative D"])
+
+        self._cluster(
+            lambda chat_settings, prompt, simple_prompt: (
+                "Explicação: D Sugestões de Aperfeiçoamento: D"
+                if "Alternative D" in prompt.split("Erradas:")[1].split("\n")[0]
+                else "Explicação: C Sugestões de Aperfeiçoamento: C"
+            )
+        )
+
+        explanations = dict(Answer.objects.values_list("id", "feedback_explanation"))
+        self.assertEqual(explanations[first.id], "C")
+        self.assertEqual(explanations[duplicate.id], "C")
+        self.assertEqual(explanations[other.id], "D")
+
+    def test_reuses_successful_clusters_when_another_cluster_fails(self):
+        self._create_answer(["Alternative A", "Alternative C"])
+        duplicate = self._create_answer(["Alternative A", "alternative C."])
+        self._create_answer(["Alternative A", "Alternative D"])
+
+        def generate_feedback(chat_settings, prompt, simple_prompt):
+            if "Alternative D" in prompt.split("Erradas:")[1].split("\n")[0]:
+                raise RuntimeError("Unavailable")
+            return "Explicação: C Sugestões de Aperfeiçoamento: C"
+
+        with self.assertRaises(FeedbackPendingException):
+            self._cluster(generate_feedback)
+
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.feedback_explanation, "C")
+
+    def test_shares_feedback_between_similar_free_text_answers(self):
+        self.item.correct_answer = ["Converts light into chemical energy"]
+        self.item.save()
+        first = self._create_answer("converts light into heat energy")
+        similar = self._create_answer("Converts the light into heat energy.")
+        prompts = []
+
+        def generate_feedback(chat_settings, prompt, simple_prompt):
+            prompts.append(prompt)
+            return "Explicação: E Sugestões de Aperfeiçoamento: S"
+
+        self._cluster(generate_feedback)
+
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(
+            set(
+                Answer.objects.filter(id__in=[first.id, similar.id]).values_list(
+                    "feedback_explanation", flat=True
+                )
+            ),
+            {"E"},
+        )
+
+
+class GenerateFeedbackDetailsTests(TestCase):
+    def test_keeps_item_order_and_bounds_concurrent_requests(self):
+        chat_settings = create_chat_settings(max_concurrent_requests=2)
+        feedbacks = create_wrong_feedbacks(create_questionnaire(chat_settings), 4)
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def generate_feedback(chat_settings, prompt, simple_prompt):
+            question = prompt.splitlines()[0].split()[-1]
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+
+            time.sleep(0.04 - int(question) * 0.01)
+
+            with lock:
+                in_flight[0] -= 1
+
+            return f"Explicação: E{question} Sugestões de Aperfeiçoamento: S"
+
+        with mock.patch("core.tasks.feedback_cache") as cache, mock.patch(
+            "core.tasks.generate_openai_feedback", side_effect=generate_feedback
+        ):
+            cache.get.return_value = None
+            generate_feedback_details(feedbacks, "Content", chat_settings)
+
+        self.assertEqual(
+            [feedback["explanation"] for feedback in feedbacks],
+            ["E0", "E1", "E2", "E3"],
+        )
+        self.assertEqual(peak[0], 2)
+
+
+class BatchFeedbackTests(TestCase):
+    def _generate(self, batch_response: str) -> list:
+        chat_settings = create_chat_settings(batch_prompts=True, batch_size=3)
+        feedbacks = create_wrong_feedbacks(create_questionnaire(chat_settings), 3)
+
+        with mock.patch("core.tasks.feedback_cache") as cache, mock.patch(
+            "core.tasks.generate_openai_batch_feedback", return_value=batch_response
+        ) as generate_batch, mock.patch(
+            "core.tasks.generate_openai_feedback",
+            side_effect=lambda chat_settings, prompt, simple_prompt: (
+                f"Explicação: {prompt.splitlines()[0]} Sugestões de Aperfeiçoamento: S"
+            ),
+        ) as generate_feedback:
+            cache.get.return_value = None
+            generate_feedback_details(feedbacks, "Content", chat_settings)
+
+        generate_batch.assert_called_once()
+        self.generated_count = generate_feedback.call_count
+
+        return [feedback["explanation"] for feedback in feedbacks]
+
+    def test_applies_a_complete_batch_response(self):
+        explanations = self._generate(
+            json.dumps(
+                {
+                    "feedbacks": [
+                        {
+                            "id": index,
+                            "explanation": f"E{index}",
+                            "improve_suggestions": "S",
+                        }
+                        for index in (3, 1, 2)
+                    ]
+                }
+            )
+        )
+
+        self.assertEqual(explanations, ["E1", "E2", "E3"])
+        self.assertEqual(self.generated_count, 0)
+
+    def test_falls_back_to_one_call_per_item_for_invalid_json(self):
+        explanations = self._generate('{"feedbacks": [{"id": 1, "explanation": "E1"')
+
+        self.assertEqual(self.generated_count, 3)
+        self.assertEqual(
+            explanations,
+            [f"Questão: Question {index}" for index in range(3)],
+        )
+
+    def test_falls_back_to_one_call_per_item_when_an_item_is_missing(self):
+        explanations = self._generate(
+            json.dumps(
+                {
+                    "feedbacks": [
+                        {
+                            "id": index,
+                            "explanation": f"E{index}",
+                            "improve_suggestions": "S",
+                        }
+                        for index in (1, 3)
+                    ]
+                }
+            )
+        )
+
+        self.assertEqual(self.generated_count, 3)
+        self.assertNotIn("E1", explanations)
+
+    def test_batch_size_fits_model_output_limit(self):
+        chat_settings = create_chat_settings(max_tokens=1000, batch_size=10)
+
+        self.assertEqual(get_batch_size(chat_settings), 4)
+
+    def test_caps_max_tokens_and_skips_json_mode_for_unsupported_models(self):
+        chat_settings = create_chat_settings(
+            principal_model="gpt-4", special_model="gpt-4", max_tokens=1000
+        )
+
+        with mock.patch("core.tasks.request_openai_completion") as request:
+            generate_openai_batch_feedback(chat_settings, "Prompt", True, 10)
+
+        request.assert_called_once_with(chat_settings, "Prompt", "gpt-4", 8192)
+
+    def test_uses_json_mode_for_supported_models(self):
+        chat_settings = create_chat_settings(max_tokens=300)
+
+        with mock.patch("core.tasks.request_openai_completion") as request:
+            generate_openai_batch_feedback(chat_settings, "Prompt", True, 2)
+
+        request.assert_called_once_with(
+            chat_settings,
+            "Prompt",
+            "gpt-4o",
+            600,
+            response_format={"type": "json_object"},
+        )
+
+
+class OpenAIClientTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.addCleanup(invalidate_openai_client, self.chat_settings.id)
+
+    def test_reuses_client_for_same_settings(self):
+        self.assertIs(
+            get_openai_client(self.chat_settings),
+            get_openai_client(ChatSettings.objects.get(id=self.chat_settings.id)),
+        )
+
+    def test_rebuilds_client_when_settings_change_in_another_process(self):
+        client = get_openai_client(self.chat_settings)
+        ChatSettings.objects.filter(id=self.chat_settings.id).update(
+            updated_at=timezone.now()
+        )
+
+        self.assertIsNot(
+            get_openai_client(ChatSettings.objects.get(id=self.chat_settings.id)),
+            client,
+        )
+
+
+class CalculateScoreTests(TestCase):
+    def test_empty_feedbacks_score_zero(self):
+        self.assertEqual(calculate_score([]), 0)
+
+
+class RegradeItemTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _submit(self, answers: list) -> None:
+        with mock.patch("core.views.generate_formative_feedback.delay"):
+            response = self.client.post(
+                "/core/send-feedback/",
+                {
+                    "questionnaire_title": "Questionnaire",
+                    "questionnaire_content": "Content",
+                    "questionnaire_external_id": "questionnaire-regrade",
+                    "student_email": "student@example.com",
+                    "subject_code": "subject-regrade",
+                    "teacher_email": "teacher@example.com",
+                    "chat_id": str(self.chat_settings.id),
+                    "items": [
+                        {
+                            "question": f"Question {index}",
+                            "answer": answer,
+                            "subcontent": "Subcontent",
+                            "correct_answer": "A",
+                        }
+                        for index, answer in enumerate(answers)
+                    ],
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_regrade_recomputes_latest_result_from_its_own_answers(self):
+        self._submit(["B", "A"])
+        self._submit(["A", "A"])
+
+        item = Item.objects.get(question="Question 1")
+        item.correct_answer = ["B"]
+        item.save()
+        regrade_item(item)
+
+        self.assertEqual(
+            list(Result.objects.order_by("created_at").values_list("score", flat=True)),
+            [50, 50],
+        )
+
+    def test_grade_questionnaire_regrades_every_item(self):
+        self._submit(["B", "B"])
+        Item.objects.update(correct_answer=["B"])
+
+        out = StringIO()
+        call_command("regrade_item", questionnaire="questionnaire-regrade", stdout=out)
+
+        self.assertEqual(out.getvalue(), "answers: 2\nresults: 1\n")
+        self.assertEqual(set(Answer.objects.values_list("correct", flat=True)), {1})
+        self.assertEqual(Result.objects.get().score, 100)
+
+    def test_grade_questionnaire_keeps_unchanged_scores(self):
+        self._submit(["B", "A"])
+
+        self.assertEqual(
+            grade_questionnaire(Questionnaire.objects.get()),
+            {"answers": 0, "results": 0},
+        )
+
+
+class QuestionnaireReportViewTests(TestCase):
+    def setUp(self):
+        self.questionnaire = create_questionnaire(create_chat_settings())
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _get_csv(self, rows):
+        with mock.patch("core.views.iter_report_table", return_value=rows):
+            return self.client.get(
+                f"/core/questionnaires/{self.questionnaire.external_id}/report/",
+                {"report_format": "csv", "table": "performance"},
+            )
+
+    def _failing_rows(self, row_count: int):
+        for index in range(row_count):
+            yield [f"Row {index}"]
+        raise RuntimeError("Database unavailable")
+
+    def test_returns_error_when_report_fails_before_streaming(self):
+        response = self._get_csv(self._failing_rows(1))
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_aborts_stream_when_report_fails_midway(self):
+        response = self._get_csv(self._failing_rows(3))
+
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(RuntimeError), self.assertLogs("core.views", "ERROR"):
+            b"".join(response.streaming_content)
+
+
+class StatisticsTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _submit(self, student: str, answers: list) -> None:
+        with mock.patch("core.views.generate_formative_feedback.delay"):
+            response = self.client.post(
+                "/core/send-feedback/",
+                {
+                    "questionnaire_title": "Questionnaire",
+                    "questionnaire_content": "Content",
+                    "questionnaire_external_id": "questionnaire-statistics",
+                    "student_email": f"{student}@example.com",
+                    "subject_code": "subject-statistics",
+                    "teacher_email": "teacher@example.com",
+                    "chat_id": str(self.chat_settings.id),
+                    "items": [
+                        {
+                            "question": f"Question {index}",
+                            "answer": answer,
+                            "subcontent": "Subcontent",
+                            "correct_answer": ["A", "B"],
+                        }
+                        for index, answer in enumerate(answers)
+                    ],
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def _snapshot(self) -> tuple:
+        questionnaire_statistics = QuestionnaireStatistics.objects.get()
+
+        return (
+            sorted(
+                ItemStatistics.objects.values_list(
+                    "item__question",
+                    "correct_count",
+                    "partially_correct_count",
+                    "incorrect_count",
+                )
+            ),
+            questionnaire_statistics.student_count,
+            questionnaire_statistics.score_sum,
+            questionnaire_statistics.histogram,
+        )
+
+    def test_incremental_statistics_match_rebuild(self):
+        self._submit("first", [["A", "B"], ["A"], ["C"]])
+        self._submit("second", [["A"], ["A", "B"], ["A", "B"]])
+        self._submit("first", [["A", "B"], ["A", "B"], ["A"]])
+        incremental = self._snapshot()
+
+        rebuild_statistics(Questionnaire.objects.get())
+
+        self.assertEqual(incremental, self._snapshot())
+        self.assertEqual(incremental[1], 2)
+
+    def test_missing_statistics_are_rebuilt_on_next_submission(self):
+        self._submit("first", [["A", "B"], ["C"]])
+        self._submit("second", [["A"], ["A", "B"]])
+        ItemStatistics.objects.all().delete()
+        QuestionnaireStatistics.objects.all().delete()
+
+        self._submit("third", [["C"], ["C"]])
+
+        snapshot = self._snapshot()
+        self.assertEqual(snapshot[1], 3)
+        self.assertEqual(
+            snapshot[0],
+            [("Question 0", 1, 1, 1), ("Question 1", 1, 0, 2)],
+        )
+
+
+class FeedbackCheckpointTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        questionnaire = create_questionnaire(self.chat_settings)
+        student = Student.objects.create(email="student@example.com")
+        answers = []
+        for index in range(3):
+            item = Item.objects.create(
+                questionnaire=questionnaire,
+                question=f"Question {index}",
+                subcontent="Subcontent",
+                correct_answer=["A"],
+            )
+            answer = Answer.objects.create(item=item, text="B")
+            answer.students.add(student)
+            answers.append(answer)
+
+        feedbacks, _ = check_answers(answers)
+        self.feedbacks = json.loads(json.dumps(feedbacks, default=str))
+        self.job = FeedbackJob.objects.create(stage=FeedbackJob.GRADED)
+        self.prompts = []
+
+    def _generate(self, failing_calls: int):
+        def generate_feedback(chat_settings, prompt, simple_prompt):
+            self.prompts.append(prompt)
+            failed_calls = sum("Question 1\n" in prompt for prompt in self.prompts)
+            if "Question 1\n" in prompt and failed_calls <= failing_calls:
+                raise RuntimeError("Unavailable")
+            return "Explicação: E Sugestões de Aperfeiçoamento: S"
+
+        return self._run(generate_feedback)
+
+    def _run(self, generate_feedback):
+        with mock.patch("core.tasks.feedback_cache") as cache, mock.patch(
+            "core.tasks.generate_openai_feedback", side_effect=generate_feedback
+        ), mock.patch("core.tasks.send_formative_feedback_email.delay") as send:
+            cache.get.return_value = None
+            generate_formative_feedback.apply(
+                args=(
+                    self.feedbacks,
+                    "Content",
+                    ["student@example.com"],
+                    "Questionnaire",
+                    0,
+                    str(self.chat_settings.id),
+                    "student@example.com",
+                    str(self.job.id),
+                )
+            )
+
+        return [feedback["pending"] for feedback in send.call_args[0][2]]
+
+    def test_retries_only_regenerate_missing_items(self):
+        pending = self._generate(failing_calls=2)
+
+        self.assertEqual(len(self.prompts), 5)
+        self.assertEqual(pending, [False, False, False])
+        self.assertEqual(Answer.objects.filter(feedback_explanation="E").count(), 3)
+
+    def test_sends_pending_items_when_retries_run_out(self):
+        with self.assertLogs("core.tasks", "WARNING"):
+            pending = self._generate(failing_calls=100)
+
+        self.assertEqual(len(self.prompts), 3 + generate_formative_feedback.max_retries)
+        self.assertEqual(pending, [False, True, False])
+
+    def test_explanation_without_suggestions_is_not_pending(self):
+        def generate_feedback(chat_settings, prompt, simple_prompt):
+            self.prompts.append(prompt)
+            return "Explicação: E Sugestões de Aperfeiçoamento:"
+
+        pending = self._run(generate_feedback)
+
+        self.assertEqual(len(self.prompts), 3)
+        self.assertEqual(pending, [False, False, False])
+
+    def test_retrying_a_resend_includes_partially_emailed_jobs(self):
+        resend_job = ResendJob.objects.create(
+            questionnaire=Questionnaire.objects.get(), recipient_emails={}
+        )
+        for stage in (FeedbackJob.EMAILED, FeedbackJob.PARTIAL, FeedbackJob.FAILED):
+            FeedbackJob.objects.create(
+                resend_job=resend_job,
+                student_email=f"{stage}@example.com",
+                stage=stage,
+                error="Error",
+            )
+
+        with mock.patch("core.resend.dispatch_feedback_resend") as dispatch:
+            self.assertEqual(retry_feedback_resend(resend_job), 2)
+
+        self.assertEqual(
+            sorted(job.student_email for job in dispatch.call_args[0][1]),
+            ["failed@example.com", "partial@example.com"],
+        )
+        self.assertFalse(
+            resend_job.feedback_jobs.filter(
+                stage__in=[FeedbackJob.FAILED, FeedbackJob.PARTIAL]
+            ).exists()
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class RenderFeedbackPDFTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_cache = PDFCache(directory.name, max_bytes=1024 * 1024)
+        self.renderer = rendering.FeedbackRenderer()
+
+        for target, value in (
+            ("core.rendering.pdf_cache", self.pdf_cache),
+            ("core.rendering.get_renderer", lambda: self.renderer),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _render(self) -> None:
+        rendering.render_feedback_pdf(
+            {
+                "questionnaire_title": "Questionnaire",
+                "feedbacks": [],
+                "correct_count_answers": 0,
+                "student_email": "student@example.com",
+            }
+        )
+
+    def test_reuses_cached_pdf_until_stylesheet_changes(self):
+        with mock.patch.object(
+            self.renderer, "write_pdf", return_value=b"%PDF"
+        ) as write_pdf:
+            self._render()
+            self._render()
+            self.assertEqual(write_pdf.call_count, 1)
+
+            self.renderer.stylesheet_hash = "changed"
+            self._render()
+            self.assertEqual(write_pdf.call_count, 2)
+
+    @override_settings(RENDER_WORKER=False)
+    def test_warms_renderer_only_on_render_workers(self):
+        with mock.patch.object(self.renderer, "write_pdf") as write_pdf:
+            rendering.warm_renderer()
+            write_pdf.assert_not_called()
+
+            with self.settings(RENDER_WORKER=True):
+                rendering.warm_renderer()
+            write_pdf.assert_called_once()
+
+
+@override_settings(EMAIL_RETRY_BACKOFF=0)
+class MailerTests(TestCase):
+    def setUp(self):
+        self.mailer = Mailer(max_idle=60, max_retries=2, messages_per_minute=30)
+        self.mailer.rate_limiter = mock.Mock()
+        patcher = mock.patch("core.mailer.get_connection")
+        self.get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuses_the_connection_between_sends(self):
+        self.mailer.send(mock.Mock())
+        self.mailer.send(mock.Mock())
+
+        self.get_connection.assert_called_once()
+        connection = self.get_connection.return_value
+        self.assertEqual(connection.send_messages.call_count, 2)
+        connection.close.assert_not_called()
+        self.assertEqual(self.mailer.rate_limiter.acquire.call_count, 2)
+
+    def test_reconnects_after_a_transient_error(self):
+        dropped, fresh = mock.Mock(), mock.Mock()
+        dropped.send_messages.side_effect = smtplib.SMTPServerDisconnected()
+        self.get_connection.side_effect = [dropped, fresh]
+
+        with self.assertLogs("core.mailer", "WARNING"):
+            self.mailer.send(mock.Mock())
+
+        dropped.close.assert_called_once()
+        fresh.send_messages.assert_called_once()
+
+    def test_raises_permanent_errors_without_retrying(self):
+        connection = self.get_connection.return_value
+        connection.send_messages.side_effect = smtplib.SMTPRecipientsRefused({})
+
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            self.mailer.send(mock.Mock())
+
+        connection.send_messages.assert_called_once()
+
+
+class SendFormativeFeedbackEmailTests(TestCase):
+    def _send(self, feedbacks, **kwargs):
+        job = FeedbackJob.objects.create(stage=FeedbackJob.GENERATED)
+        with mock.patch(
+            "core.tasks.render_feedback_pdf", return_value=b"%PDF"
+        ), mock.patch("core.tasks.mailer.send", **kwargs):
+            send_formative_feedback_email(
+                ["student@example.com"],
+                "Questionnaire",
+                feedbacks,
+                0,
+                "student@example.com",
+                str(job.id),
+            )
+
+        job.refresh_from_db()
+        return job
+
+    def test_marks_the_job_once_the_email_is_sent(self):
+        self.assertEqual(self._send([{"pending": False}]).stage, FeedbackJob.EMAILED)
+
+        job = self._send([{"pending": True}, {"pending": False}])
+        self.assertEqual(job.stage, FeedbackJob.PARTIAL)
+        self.assertEqual(job.error, "1 feedback items pending.")
+
+    def test_marks_the_job_failed_when_sending_fails(self):
+        job = self._send([], side_effect=smtplib.SMTPServerDisconnected("Closed"))
+
+        self.assertEqual(job.stage, FeedbackJob.FAILED)
+        self.assertEqual(job.error, "Closed")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class FeedbackCacheTests(TestCase):
+    def setUp(self):
+        self.feedback_cache = FeedbackCache(max_entries=2, ttl=60)
+
+    def test_key_ignores_answer_order_and_formatting(self):
+        self.assertEqual(
+            self.feedback_cache.make_key("item", ["B ", "a"], "gpt-4", "Prompt"),
+            self.feedback_cache.make_key("item", ["A", "b"], "gpt-4", "Prompt"),
+        )
+        self.assertNotEqual(
+            self.feedback_cache.make_key("item", ["A"], "gpt-4", "Prompt"),
+            self.feedback_cache.make_key("item", ["A"], "gpt-4", "Other prompt"),
+        )
+
+    def test_reads_shared_entries_into_the_local_tier(self):
+        self.assertIsNone(self.feedback_cache.get("key"))
+        self.feedback_cache.set("key", "Explanation", "Suggestions")
+        self.feedback_cache.local.clear()
+
+        self.assertEqual(self.feedback_cache.get("key"), ("Explanation", "Suggestions"))
+        self.assertEqual(self.feedback_cache.get("key"), ("Explanation", "Suggestions"))
+        self.assertEqual(
+            self.feedback_cache.counters,
+            {"local_hits": 1, "shared_hits": 1, "misses": 1},
+        )
+
+        self.feedback_cache.delete("key")
+        self.assertIsNone(self.feedback_cache.get("key"))
+
+    def test_local_tier_evicts_least_recently_used_and_expired_entries(self):
+        local = LocalLRUCache(max_entries=2, ttl=60)
+        local.set("first", 1)
+        local.set("second", 2)
+        local.get("first")
+        local.set("third", 3)
+
+        self.assertEqual((local.get("first"), local.get("second")), (1, None))
+
+        with mock.patch(
+            "core.cache.time.monotonic", return_value=time.monotonic() + 61
+        ):
+            self.assertIsNone(local.get("third"))
+        self.assertEqual(len(local), 1)
+
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        self.rate_limiter = RateLimiter("sk-test", requests_per_minute=60)
+        patcher = mock.patch("core.rate_limit.get_redis_client")
+        self.redis = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_waits_until_the_bucket_has_capacity(self):
+        self.redis.eval.side_effect = [250, 0]
+
+        with mock.patch("core.rate_limit.time.sleep") as sleep:
+            self.rate_limiter.acquire(100)
+
+        self.assertEqual(self.redis.eval.call_count, 2)
+        self.assertGreaterEqual(sleep.call_args[0][0], 0.25)
+        self.assertEqual(self.redis.eval.call_args[0][-1], 100)
+
+    def test_does_not_block_when_redis_is_unavailable(self):
+        self.redis.eval.side_effect = redis.ConnectionError("Unavailable")
+
+        with mock.patch("core.rate_limit.time.sleep") as sleep:
+            self.rate_limiter.acquire(100)
+
+        sleep.assert_not_called()
+
+    def test_stores_limits_and_cools_down_when_exhausted(self):
+        self.redis.pttl.return_value = -2
+
+        self.rate_limiter.update_from_headers(
+            {
+                "x-ratelimit-limit-requests": "500",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "1m30s",
+            }
+        )
+
+        self.redis.hset.assert_called_once_with(
+            f"{self.rate_limiter.key_prefix}:limits", mapping={"requests": "500"}
+        )
+        self.redis.set.assert_called_once_with(
+            f"{self.rate_limiter.key_prefix}:cooldown", 1, px=90000
+        )
+
+    def test_parses_openai_durations(self):
+        self.assertEqual(parse_duration("6m0s"), 360)
+        self.assertEqual(parse_duration("1.5"), 1.5)
+        self.assertEqual(parse_duration("250ms"), 0.25)
+        self.assertEqual(get_retry_after({"retry-after-ms": "1500"}), 1.5)
+        self.assertEqual(get_retry_after({"retry-after": "2"}), 2)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_questionnaire(create_chat_settings())
+        create_questionnaire(create_chat_settings(), suffix="2")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+        patcher = mock.patch("core.views.send_questionnaire_report.delay")
+        self.send_report = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, external_id: str = "questionnaire", key: str = "key"):
+        return self.client.post(
+            "/core/send-report/",
+            {"questionnaire_external_id": external_id},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replays_the_first_response(self):
+        first = self._post()
+        second = self._post()
+
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.send_report.assert_called_once()
+
+        self._post(key="other")
+        self.assertEqual(self.send_report.call_count, 2)
+
+    def test_rejects_a_reused_key_with_a_different_payload(self):
+        self._post()
+        response = self._post(external_id="questionnaire2")
+
+        self.assertEqual(response.status_code, 422)
+        self.send_report.assert_called_once()
+
+    def test_rejects_a_request_while_the_key_is_in_progress(self):
+        with mock.patch("core.idempotency.cache.add", return_value=False):
+            response = self._post()
+
+        self.assertEqual(response.status_code, 409)
+        self.send_report.assert_not_called()
+
+
+class BackfillContentHashesMigrationTests(TransactionTestCase):
+    migrate_from = [("core", "0007_item_question_hash_answer_text_hash")]
+    migrate_to = [("core", "0008_backfill_content_hashes")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.apps = executor.loader.project_state(self.migrate_from).apps
+        self.addCleanup(self._migrate_to_latest)
+
+    def _migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_merges_duplicate_items_and_answers(self):
+        chat_settings = self.apps.get_model("core", "ChatSettings").objects.create(
+            openai_api_key="test-key",
+            principal_model="gpt-4o",
+            special_model="gpt-4o",
+            system_content_instructions="Instructions",
+            max_tokens=300,
+            temperature=1,
+            top_p=1,
+            frequency_penalty=0,
+            presence_penalty=0,
+        )
+        subject = self.apps.get_model("core", "Subject").objects.create(
+            code="subject", chat_settings=chat_settings
+        )
+        questionnaire = self.apps.get_model("core", "Questionnaire").objects.create(
+            title="Questionnaire", content="Content", subject=subject
+        )
+        Item = self.apps.get_model("core", "Item")
+        Answer = self.apps.get_model("core", "Answer")
+        Student = self.apps.get_model("core", "Student")
+        first_student = Student.objects.create(email="first@example.com")
+        second_student = Student.objects.create(email="second@example.com")
+
+        items = [
+            Item.objects.create(
+                questionnaire=questionnaire,
+                question=question,
+                subcontent="Subcontent",
+                correct_answer=["A"],
+            )
+            for question in ("Question 1", " Question  1\n")
+        ]
+        answers = []
+        for item, text, students in (
+            (items[0], ["A", "B"], [first_student]),
+            (items[1], ["B", "A"], [first_student, second_student]),
+            (items[1], ["C"], [second_student]),
+        ):
+            answer = Answer.objects.create(item=item, text=text)
+            answer.students.set(students)
+            answers.append(answer)
+
+        apps = self._migrate()
+        Item = apps.get_model("core", "Item")
+        Answer = apps.get_model("core", "Answer")
+
+        item = Item.objects.get()
+        self.assertEqual(item.id, items[0].id)
+        self.assertEqual(item.question_hash, hash_question("Question 1"))
+
+        merged_answer, other_answer = Answer.objects.order_by("created_at")
+        self.assertEqual(merged_answer.id, answers[0].id)
+        self.assertEqual(merged_answer.text_hash, hash_answer_text(["A", "B"]))
+        self.assertEqual(
+            set(merged_answer.students.values_list("email", flat=True)),
+            {"first@example.com", "second@example.com"},
+        )
+        self.assertEqual(other_answer.item_id, item.id)
+        self.assertEqual(other_answer.text_hash, hash_answer_text(["C"]))
+
+
+class ResendJobTests(TestCase):
+    def setUp(self):
+        self.questionnaire = create_questionnaire(create_chat_settings())
+        item = Item.objects.create(
+            questionnaire=self.questionnaire,
+            question="Question",
+            subcontent="Subcontent",
+            correct_answer=["A"],
+        )
+        answer = Answer.objects.create(item=item, text="A")
+        answer.students.add(Student.objects.create(email="answered@example.com"))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+        patcher = mock.patch("core.resend.chord")
+        self.chord = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _start(self) -> ResendJob:
+        return start_feedback_resend(
+            self.questionnaire,
+            ["answered@example.com", "missing@example.com", "answered@example.com"],
+            {"students": ["student"], "teachers": ["teacher@example.com"]},
+        )
+
+    def test_tracks_each_student_of_a_resend(self):
+        resend_job = self._start()
+
+        tasks = self.chord.call_args[0][0]
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(
+            tasks[0].args[2], ["teacher@example.com", "answered@example.com"]
+        )
+
+        response = self.client.get(f"/core/resend-jobs/{resend_job.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["counts"][FeedbackJob.GRADED], 1)
+        self.assertEqual(response.data["counts"][FeedbackJob.FAILED], 1)
+        self.assertFalse(response.data["completed"])
+
+    def test_retry_redispatches_only_failed_students(self):
+        resend_job = self._start()
+        resend_job.feedback_jobs.filter(student_email="answered@example.com").update(
+            stage=FeedbackJob.EMAILED
+        )
+        Answer.objects.get().students.add(
+            Student.objects.create(email="missing@example.com")
+        )
+        self.chord.reset_mock()
+
+        response = self.client.post(f"/core/resend-jobs/{resend_job.id}/retry/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["retried"], 1)
+        tasks = self.chord.call_args[0][0]
+        self.assertEqual([task.args[6] for task in tasks], ["missing@example.com"])
+        self.assertEqual(
+            dict(resend_job.feedback_jobs.values_list("student_email", "stage")),
+            {
+                "answered@example.com": FeedbackJob.EMAILED,
+                "missing@example.com": FeedbackJob.GRADED,
+            },
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class PDFCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_cache = PDFCache(directory.name, max_bytes=10)
+
+    def _age(self, key: str, seconds: int) -> None:
+        modified_at = time.time() - seconds
+        os.utime(self.pdf_cache._path(key), (modified_at, modified_at))
+
+    def test_evicts_least_recently_used_pdfs_over_the_size_limit(self):
+        self.pdf_cache.set("first", b"1234")
+        self.pdf_cache.set("second", b"1234")
+        self._age("first", 20)
+        self._age("second", 10)
+
+        self.assertEqual(self.pdf_cache.get("first"), b"1234")
+        self.pdf_cache.set("third", b"1234")
+
+        self.assertIsNone(self.pdf_cache.get("second"))
+        self.assertEqual(self.pdf_cache.get("first"), b"1234")
+        self.assertEqual(self.pdf_cache.get("third"), b"1234")
+        self.assertEqual(self.pdf_cache.counters["evictions"], 1)
+
+    def test_skips_pdfs_larger_than_the_cache(self):
+        self.pdf_cache.set("large", b"12345678901")
+
+        self.assertIsNone(self.pdf_cache.get("large"))
+        self.assertEqual(self.pdf_cache.stats()["entries"], 0)
+
+
+class SendQuestionnaireReportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.reports_dir = directory.name
+        self.questionnaire = create_questionnaire(create_chat_settings())
+        item = Item.objects.create(
+            questionnaire=self.questionnaire,
+            question="Question",
+            subcontent="Subcontent",
+            correct_answer=["A"],
+        )
+        student = Student.objects.create(email="student@example.com")
+        answer = Answer.objects.create(item=item, text="A", correct=1)
+        answer.students.add(student)
+        Result.objects.create(
+            student=student, questionnaire=self.questionnaire, score=100
+        )
+
+    def _write_report(self) -> str:
+        report_path = os.path.join(self.reports_dir, "relatorio.xlsx")
+        with open(report_path, "wb") as report_file:
+            report_file.write(b"report")
+
+        return report_path
+
+    def test_emails_the_report_and_removes_the_file(self):
+        with self.settings(REPORTS_DIR=self.reports_dir), mock.patch(
+            "core.tasks.mailer.send"
+        ) as send:
+            send_questionnaire_report(
+                str(self.questionnaire.id), ["teacher@example.com"]
+            )
+
+        email = send.call_args[0][0]
+        self.assertEqual(email.to, ["teacher@example.com"])
+        self.assertEqual(email.attachments[0][0], "relatorio.xlsx")
+        self.assertTrue(email.attachments[0][1].startswith(b"PK"))
+        self.assertEqual(os.listdir(self.reports_dir), [])
+
+    @override_settings(EMAIL_RETRY_BACKOFF=0)
+    def test_retries_transient_errors_and_keeps_the_report(self):
+        report_path = self._write_report()
+
+        with mock.patch(
+            "core.tasks.mailer.send", side_effect=smtplib.SMTPServerDisconnected()
+        ) as send, self.assertLogs("core.tasks", "WARNING"):
+            result = send_email_with_report.apply(
+                args=("Subject", "Body", ["teacher@example.com"], report_path)
+            )
+
+        self.assertTrue(result.failed())
+        self.assertEqual(send.call_count, send_email_with_report.max_retries + 1)
+        self.assertTrue(os.path.exists(report_path))
+
+    def test_fails_permanent_errors_without_retrying(self):
+        report_path = self._write_report()
+
+        with mock.patch(
+            "core.tasks.mailer.send",
+            side_effect=smtplib.SMTPRecipientsRefused({}),
+        ) as send, self.assertLogs("core.tasks", "ERROR"):
+            result = send_email_with_report.apply(
+                args=("Subject", "Body", ["teacher@example.com"], report_path)
+            )
+
+        self.assertTrue(result.failed())
+        send.assert_called_once()
+        self.assertTrue(os.path.exists(report_path))
+
+
+class QuestionnaireReportTests(TestCase):
+    def setUp(self):
+        self.questionnaire = create_questionnaire(create_chat_settings())
+        self.items = [
+            Item.objects.create(
+                questionnaire=self.questionnaire,
+                question=f"Question {index}",
+                subcontent="Subcontent",
+                correct_answer=["A"],
+            )
+            for index in range(3)
+        ]
+        self.students = {
+            name: Student.objects.create(email=f"{name}@example.com")
+            for name in ("complete", "partial", "absent")
+        }
+        self.questionnaire.students.add(*self.students.values())
+
+    def _answer(self, student: str, item_index: int, correct: float) -> None:
+        answer = Answer.objects.create(
+            item=self.items[item_index], text=student, correct=correct
+        )
+        answer.students.add(self.students[student])
+
+    def _result(self, student: str, score: int) -> None:
+        Result.objects.create(
+            student=self.students[student],
+            questionnaire=self.questionnaire,
+            score=score,
+        )
+
+    def test_performance_table_aligns_answers_with_students_and_items(self):
+        for item_index, correct in ((2, 1), (0, 0), (1, 0.5)):
+            self._answer("complete", item_index, correct)
+        self._answer("partial", 2, 1)
+        self._result("complete", 10)
+        self._result("complete", 50)
+        self._result("partial", 33.33)
+
+        header, *rows = iter_report_table(self.questionnaire, "performance")
+
+        self.assertEqual(
+            header, ["Aluno", "Question 0", "Question 1", "Question 2", "Pontuação"]
+        )
+        self.assertEqual(
+            sorted(rows),
+            [
+                ["absent@example.com", 0.0, 0.0, 0.0, 0.0],
+                ["complete@example.com", 0.0, 0.5, 1.0, 50.0],
+                ["partial@example.com", 0.0, 0.0, 1.0, 33.33],
+            ],
+        )
+
+    def test_statistics_table_counts_missing_answers_as_incorrect(self):
+        for student in ("complete", "partial"):
+            self._answer(student, 2, 1)
+        self._answer("complete", 0, 0.5)
+
+        _, *rows = iter_report_table(self.questionnaire, "statistics")
+
+        self.assertEqual(
+            [row[:5] for row in rows],
+            [
+                ["Question 0", 0, 1, 2, 3],
+                ["Question 1", 0, 0, 3, 3],
+                ["Question 2", 2, 0, 1, 3],
+            ],
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SubjectGradebookViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        chat_settings = create_chat_settings()
+        first = create_questionnaire(chat_settings)
+        self.subject = first.subject
+        second = Questionnaire.objects.create(
+            title="Second",
+            content="Content",
+            external_id="second",
+            subject=first.subject,
+        )
+        first.title = "First"
+        first.save()
+        self.students = [
+            Student.objects.create(email=f"student-{index}@example.com")
+            for index in range(2)
+        ]
+        self.subject.students.add(*self.students)
+        items = [
+            Item.objects.create(
+                questionnaire=questionnaire,
+                question=f"Question {subcontent}",
+                subcontent=subcontent,
+                correct_answer=["A"],
+            )
+            for questionnaire, subcontent in ((first, "Algebra"), (second, "Geometry"))
+        ]
+
+        for student, item, text, correct in (
+            (self.students[0], items[0], "B", 0),
+            (self.students[0], items[0], "A", 1),
+            (self.students[0], items[1], "C", 0),
+            (self.students[1], items[0], "D", 0.5),
+        ):
+            Answer.objects.create(item=item, text=text, correct=correct).students.add(
+                student
+            )
+
+        for student, questionnaire, score in (
+            (self.students[0], first, 0),
+            (self.students[0], first, 100),
+            (self.students[0], second, 0),
+            (self.students[1], first, 50),
+        ):
+            Result.objects.create(
+                student=student, questionnaire=questionnaire, score=score
+            )
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _get(self, **headers):
+        return self.client.get(
+            f"/core/subjects/{self.subject.code}/gradebook/", **headers
+        )
+
+    def test_gradebook_uses_latest_answers_and_results(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(BytesIO(response.content))
+        sheets = {
+            sheet.title: [list(row) for row in sheet.iter_rows(values_only=True)]
+            for sheet in workbook.worksheets
+        }
+        header, *scores = sheets["Notas por Questionário"]
+        self.assertEqual(header, ["Aluno", "First", "Second", "Média"])
+        self.assertEqual(
+            sorted(scores),
+            [
+                ["student-0@example.com", 100, 0, 50],
+                ["student-1@example.com", 50, None, 50],
+            ],
+        )
+        header, *mastery = sheets["Domínio por Subconteúdo"]
+        self.assertEqual(header, ["Aluno", "Algebra", "Geometry"])
+        self.assertEqual(
+            sorted(mastery),
+            [
+                ["student-0@example.com", 100, 0],
+                ["student-1@example.com", 50, None],
+            ],
+        )
+        self.assertEqual(
+            sheets["Resumo da Disciplina"][1:],
+            [
+                ["Questionário", "First", 75, 2],
+                ["Questionário", "Second", 0, 1],
+                ["Subconteúdo", "Algebra", 75, 2],
+                ["Subconteúdo", "Geometry", 0, 1],
+            ],
+        )
+
+    def test_gradebook_is_not_modified_until_a_new_result(self):
+        etag = self._get()["ETag"]
+
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Result.objects.create(
+            student=self.students[1],
+            questionnaire=Questionnaire.objects.get(external_id="second"),
+            score=100,
+        )
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class RegisterQuestionnaireViewTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+
+    def _register(self, correct_answer: str = "A", external_id: str = "registered"):
+        return self.client.post(
+            "/core/questionnaires/",
+            {
+                "questionnaire_title": "Questionnaire",
+                "questionnaire_content": "Content",
+                "questionnaire_external_id": external_id,
+                "subject_code": f"subject-{external_id}",
+                "teacher_email": "teacher@example.com",
+                "chat_id": str(self.chat_settings.id),
+                "items": [
+                    {
+                        "question": "Question",
+                        "subcontent": "Subcontent",
+                        "correct_answer": correct_answer,
+                    }
+                ],
+            },
+            format="json",
+        )
+
+    def _submit(self, item_id, answer: str = "B", external_id: str = "registered"):
+        with mock.patch("core.views.generate_formative_feedback.delay"):
+            return self.client.post(
+                "/core/send-feedback/",
+                {
+                    "questionnaire_title": "Questionnaire",
+                    "questionnaire_content": "Content",
+                    "questionnaire_external_id": external_id,
+                    "student_email": "student@example.com",
+                    "subject_code": f"subject-{external_id}",
+                    "teacher_email": "teacher@example.com",
+                    "chat_id": str(self.chat_settings.id),
+                    "items": [{"item_id": str(item_id), "answer": answer}],
+                },
+                format="json",
+            )
+
+    def test_registers_items_once(self):
+        response = self._register()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["version"], 1)
+        [item] = response.data["items"]
+        self.assertEqual(item["question"], "Question")
+
+        response = self._register()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 1)
+        self.assertEqual(response.data["items"][0]["item_id"], item["item_id"])
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_submits_answers_by_item_id(self):
+        item_id = self._register().data["items"][0]["item_id"]
+
+        self.assertEqual(self._submit(item_id, "A").status_code, 201)
+
+        answer = Answer.objects.get()
+        self.assertEqual(answer.item_id, item_id)
+        self.assertEqual(answer.correct, 1)
+        self.assertEqual(Result.objects.get().score, 100)
+
+    def test_reregistering_a_changed_answer_bumps_version_and_regrades(self):
+        item_id = self._register().data["items"][0]["item_id"]
+        self._submit(item_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._register(correct_answer="B")
+
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(Answer.objects.get().correct, 1)
+        self.assertEqual(Result.objects.get().score, 100)
+
+        self._submit(item_id)
+
+        self.assertEqual(
+            list(Result.objects.order_by("created_at").values_list("score", flat=True)),
+            [100, 100],
+        )
+
+    def test_rejects_an_item_of_another_questionnaire(self):
+        self._register()
+        other_item_id = self._register(external_id="other").data["items"][0]["item_id"]
+
+        response = self._submit(other_item_id)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(other_item_id), response.data["reason"])
+        self.assertFalse(Answer.objects.exists())
+
+
+class AsyncSubmissionTests(TestCase):
+    def setUp(self):
+        self.chat_settings = create_chat_settings()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="lms"))
+        self.stages = []
+
+    def _submit(self, chat_id: str):
+        def record_stage(job_id, stage, error=None):
+            self.stages.append(stage)
+            update_feedback_job(job_id, stage, error)
+
+        with mock.patch(
+            "core.ingestion.update_feedback_job", side_effect=record_stage
+        ), mock.patch(
+            "core.tasks.update_feedback_job", side_effect=record_stage
+        ), mock.patch(
+            "core.tasks.feedback_cache"
+        ) as feedback_cache, mock.patch(
+            "core.tasks.generate_openai_feedback",
+            return_value="Explicação: E Sugestões de Aperfeiçoamento: S",
+        ), mock.patch(
+            "core.tasks.render_feedback_pdf", return_value=b"%PDF"
+        ), mock.patch(
+            "core.tasks.mailer.send"
+        ), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            feedback_cache.get.return_value = None
+            response = self.client.post(
+                "/core/send-feedback/?async=true",
+                {
+                    "questionnaire_title": "Questionnaire",
+                    "questionnaire_content": "Content",
+                    "questionnaire_external_id": "questionnaire-async",
+                    "student_email": "student@example.com",
+                    "subject_code": "subject-async",
+                    "teacher_email": "teacher@example.com",
+                    "chat_id": chat_id,
+                    "items": [
+                        {
+                            "question": "Question",
+                            "answer": "B",
+                            "subcontent": "Subcontent",
+                            "correct_answer": "A",
+                        }
+                    ],
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+
+        return self.client.get(f"/core/jobs/{response.data['job_id']}/").data
+
+    def test_job_moves_through_every_stage(self):
+        job = self._submit(str(self.chat_settings.id))
+
+        self.assertEqual(
+            self.stages,
+            [
+                FeedbackJob.PERSISTED,
+                FeedbackJob.GRADED,
+                FeedbackJob.GENERATED,
+                FeedbackJob.RENDERED,
+                FeedbackJob.EMAILED,
+            ],
+        )
+        self.assertEqual(job["stage"], FeedbackJob.EMAILED)
+        self.assertEqual(Result.objects.get().score, 0)
+
+    def test_job_fails_when_ingestion_fails(self):
+        job = self._submit(str(uuid.uuid4()))
+
+        self.assertEqual(self.stages, [FeedbackJob.FAILED])
+        self.assertEqual(job["stage"], FeedbackJob.FAILED)
+        self.assertIn("ChatSettings matching query does not exist", job["error"])
+        self.assertFalse(Answer.objects.exists())
@@ -1,8 +1,52 @@
 from django.urls import path
-from .views import SendFeedbackView, ResendFeedbackView, SendReportView
+from .views import (
+    SendFeedbackView,
+    BulkSendFeedbackView,
+    ResendFeedbackView,
+    ResendJobView,
+    RetryResendJobView,
+    SendReportView,
+    FeedbackJobView,
+    RegisterQuestionnaireView,
+    QuestionnaireReportView,
+    SubjectGradebookView,
+    CacheStatsView,
+)
 
 urlpatterns = [
     path("send-feedback/", SendFeedbackView.as_view(), name="send-feedback"),
+    path(
+        "send-feedback/bulk/",
+        BulkSendFeedbackView.as_view(),
+        name="send-feedback-bulk",
+    ),
     path("resend-feedback/", ResendFeedbackView.as_view(), name="resend-feedback"),
+    path(
+        "resend-jobs/<uuid:resend_job_id>/",
+        ResendJobView.as_view(),
+        name="resend-job",
+    ),
+    path(
+        "resend-jobs/<uuid:resend_job_id>/retry/",
+        RetryResendJobView.as_view(),
+        name="resend-job-retry",
+    ),
     path("send-report/", SendReportView.as_view(), name="send-report"),
+    path(
+        "questionnaires/",
+        RegisterQuestionnaireView.as_view(),
+        name="register-questionnaire",
+    ),
+    path(
+        "questionnaires/<str:questionnaire_external_id>/report/",
+        QuestionnaireReportView.as_view(),
+        name="questionnaire-report",
+    ),
+    path(
+        "subjects/<str:subject_code>/gradebook/",
+        SubjectGradebookView.as_view(),
+        name="subject-gradebook",
+    ),
+    path("jobs/<uuid:job_id>/", FeedbackJobView.as_view(), name="feedback-job"),
+    path("cache-stats/", CacheStatsView.as_view(), name="cache-stats"),
 ]
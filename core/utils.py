@@ -1,38 +1,132 @@
-from .models import Answer
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from django.db import transaction
+from django.utils import timezone
+from .models import Answer, FeedbackJob, Result
+from .stats import rebuild_statistics
+
+GRADING_BATCH_SIZE = 1000
+SCORE_PRECISION = Decimal("0.01")
 
 
 def check_answers(answers: list) -> tuple:
+    feedbacks, correct_count_answers = grade_answers(answers)
+    save_correct_answers(answers)
+
+    return feedbacks, correct_count_answers
+
+
+def grade_questionnaire(questionnaire) -> Dict[str, int]:
+    answer_keys = {}
+    for item in questionnaire.items.all():
+        get_answer_key(item, answer_keys)
+
+    return regrade_answers(
+        questionnaire,
+        Answer.objects.filter(item__questionnaire=questionnaire),
+        answer_keys,
+    )
+
+
+def regrade_item(item) -> Dict[str, int]:
+    return regrade_answers(
+        item.questionnaire,
+        Answer.objects.filter(item=item),
+        {item.id: get_answer_key(item, {})},
+    )
+
+
+def regrade_answers(questionnaire, answers, answer_keys: dict) -> Dict[str, int]:
+    changed_answers = []
+    student_ids = set()
+    report = {"answers": 0, "results": 0}
+
+    answers = answers.only("id", "text", "correct", "item_id")
+    for answer in answers.iterator(chunk_size=GRADING_BATCH_SIZE):
+        previous_score = answer.correct
+        grade_answer(answer, answer_keys[answer.item_id])
+        if answer.correct != previous_score:
+            changed_answers.append(answer)
+
+        if len(changed_answers) >= GRADING_BATCH_SIZE:
+            student_ids.update(save_regraded_answers(changed_answers))
+            report["answers"] += len(changed_answers)
+            changed_answers = []
+
+    student_ids.update(save_regraded_answers(changed_answers))
+    report["answers"] += len(changed_answers)
+
+    student_ids = list(student_ids)
+    for index in range(0, len(student_ids), GRADING_BATCH_SIZE):
+        report["results"] += save_regraded_results(
+            questionnaire.id, student_ids[index : index + GRADING_BATCH_SIZE]
+        )
+
+    if report["answers"]:
+        rebuild_statistics(questionnaire)
+
+    return report
+
+
+def save_regraded_answers(answers: list) -> Set:
+    if not answers:
+        return set()
+
+    with transaction.atomic():
+        Answer.objects.bulk_update(answers, ["correct"])
+        Answer.objects.filter(id__in=[answer.id for answer in answers]).update(
+            feedback_explanation=None, feedback_improve_suggestions=None
+        )
+
+    return set(
+        Answer.students.through.objects.filter(
+            answer_id__in=[answer.id for answer in answers]
+        ).values_list("student_id", flat=True)
+    )
+
+
+def save_regraded_results(questionnaire_id, student_ids: list) -> int:
+    latest_results = {}
+    for result in Result.objects.filter(
+        questionnaire_id=questionnaire_id, student_id__in=student_ids
+    ).order_by("student_id", "-created_at"):
+        latest_results.setdefault(result.student_id, result)
+
+    result_answers = defaultdict(list)
+    for result_answer in Result.answers.through.objects.filter(
+        result_id__in=[result.id for result in latest_results.values()]
+    ).select_related("answer__item"):
+        result_answers[result_answer.result_id].append(result_answer.answer)
+
+    answer_keys = {}
+    updated_results = []
+    for result in latest_results.values():
+        answers = result_answers.get(result.id)
+        if not answers:
+            continue
+
+        feedbacks, _ = grade_answers(answers, answer_keys)
+        score = Decimal(calculate_score(feedbacks)).quantize(SCORE_PRECISION)
+        if result.score != score:
+            result.score = score
+            updated_results.append(result)
+
+    return Result.objects.bulk_update(updated_results, ["score"])
+
+
+def grade_answers(answers: list, answer_keys: Optional[dict] = None) -> tuple:
+    if answer_keys is None:
+        answer_keys = {}
+
     feedbacks = []
     correct_count_answers = 0
 
     for answer in answers:
-        correct_answers = (
-            answer.item.correct_answer
-            if type(answer.item.correct_answer) == list
-            else [answer.item.correct_answer]
+        correct_answers, correct_answers_set = get_answer_key(answer.item, answer_keys)
+        student_answers, result, wrong_answers, score, is_correct = grade_answer(
+            answer, (correct_answers, correct_answers_set)
         )
-        student_answers = answer.text if type(answer.text) == list else [answer.text]
-
-        total_correct = len(correct_answers)
-        is_correct = True
-        wrong_answers = []
-        result = {}
-        number_of_correct_student_answers = 0
-
-        for student_answer in student_answers:
-            if student_answer in correct_answers:
-                result[student_answer] = True
-                number_of_correct_student_answers += 1
-            else:
-                result[student_answer] = False
-                wrong_answers.append(student_answer)
-                number_of_correct_student_answers -= 1
-                is_correct = False
-
-        score = max(number_of_correct_student_answers / total_correct, 0)
-
-        if number_of_correct_student_answers != len(correct_answers):
-            is_correct = False
 
         if is_correct:
             correct_count_answers += 1
@@ -46,18 +140,95 @@ def check_answers(answers: list) -> tuple:
             "explanation": answer.feedback_explanation,
             "improve_suggestions": answer.feedback_improve_suggestions,
             "answer_id": answer.id,
+            "item_id": answer.item.id,
             "wrong_answers": wrong_answers,
             "result": result,
             "score": score,
         }
         feedbacks.append(feedback)
 
-        save_correct_answer(answer.id, score)
-
     return feedbacks, correct_count_answers
 
 
-def save_correct_answer(answer_id: int, score: float) -> None:
-    answer = Answer.objects.get(id=answer_id)
-    answer.correct = score
-    answer.save()
+def get_answer_key(item, answer_keys: dict) -> Tuple[list, FrozenSet[str]]:
+    answer_key = answer_keys.get(item.id)
+
+    if answer_key is None:
+        correct_answers = (
+            item.correct_answer
+            if type(item.correct_answer) == list
+            else [item.correct_answer]
+        )
+        answer_key = (correct_answers, frozenset(correct_answers))
+        answer_keys[item.id] = answer_key
+
+    return answer_key
+
+
+def grade_answer(answer, answer_key: Tuple[list, FrozenSet[str]]) -> tuple:
+    correct_answers, correct_answers_set = answer_key
+    student_answers = answer.text if type(answer.text) == list else [answer.text]
+
+    is_correct = True
+    wrong_answers = []
+    result = {}
+    number_of_correct_student_answers = 0
+
+    for student_answer in student_answers:
+        if student_answer in correct_answers_set:
+            result[student_answer] = True
+            number_of_correct_student_answers += 1
+        else:
+            result[student_answer] = False
+            wrong_answers.append(student_answer)
+            number_of_correct_student_answers -= 1
+            is_correct = False
+
+    score = max(number_of_correct_student_answers / len(correct_answers), 0)
+
+    if number_of_correct_student_answers != len(correct_answers):
+        is_correct = False
+
+    answer.correct = Decimal(score).quantize(SCORE_PRECISION)
+
+    return student_answers, result, wrong_answers, score, is_correct
+
+
+def calculate_score(feedbacks: list) -> float:
+    total_score = 0
+    total_questions = 0
+    for feedback in feedbacks:
+        total_score += feedback["score"]
+        total_questions += 1
+
+    if not total_questions:
+        return 0
+
+    return (total_score) * 100 / total_questions
+
+
+def save_correct_answers(answers: list) -> int:
+    return Answer.objects.bulk_update(answers, ["correct"])
+
+
+def normalize_answers(answers: List[str]) -> List[str]:
+    return sorted({" ".join(answer.split()).casefold() for answer in answers})
+
+
+def start_feedback_job(job_id: Optional[str]) -> None:
+    if job_id:
+        now = timezone.now()
+        FeedbackJob.objects.filter(id=job_id).update(started_at=now, updated_at=now)
+
+
+def update_feedback_job(
+    job_id: Optional[str], stage: str, error: Optional[str] = None
+) -> None:
+    if job_id:
+        now = timezone.now()
+        finished_at = (
+            {"finished_at": now} if stage in FeedbackJob.FINISHED_STAGES else {}
+        )
+        FeedbackJob.objects.filter(id=job_id).update(
+            stage=stage, error=error, updated_at=now, **finished_at
+        )
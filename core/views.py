@@ -2,31 +2,71 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from celery import group
 from .models import (
-    Student,
     Questionnaire,
-    Item,
     Answer,
-    Result,
     Teacher,
-    Subject,
     ChatSettings,
+    FeedbackJob,
+    ResendJob,
+    Subject,
 )
 from typing import List, Dict, Union
-from .tasks import generate_formative_feedback, send_email_with_report
+from .tasks import (
+    generate_formative_feedback,
+    process_feedback_job,
+    send_questionnaire_report,
+)
+from .cache import feedback_cache, pdf_cache
 from .exceptions import FeedbackGenerationException
-from .utils import check_answers
+from .reports import (
+    get_gradebook_etag,
+    get_report_etag,
+    iter_report_table,
+    write_gradebook_workbook,
+    write_report_workbook,
+)
+from .stats import get_item_scores, get_result_scores, update_statistics
+from .utils import calculate_score, grade_answers, save_correct_answers
+from .ingestion import (
+    get_or_create_students,
+    ingest_submission,
+    register_questionnaire,
+    save_answers,
+    save_items,
+    save_results,
+    save_subject,
+)
+from .idempotency import idempotent, idempotency_key_parameter
+from .resend import retry_feedback_resend, start_feedback_resend
 from .serializers import (
     SendFeedbackSerializer,
+    BulkSendFeedbackSerializer,
     ResendFeedbackSerializer,
     SendReportSerializer,
+    FeedbackJobSerializer,
+    ResendJobSerializer,
+    RegisterQuestionnaireSerializer,
+    QuestionnaireReportSerializer,
 )
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-
-import pandas as pd
+from itertools import chain, islice
+import csv
 import io
+import logging
+import pandas as pd
+import tempfile
+
+logger = logging.getLogger(__name__)
 
 
 class SendFeedbackView(APIView):
@@ -34,6 +74,7 @@ class SendFeedbackView(APIView):
 
     @swagger_auto_schema(
         operation_description="Submeter um questionário preenchido e gerar seu feedback",
+        manual_parameters=[idempotency_key_parameter],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -66,6 +107,10 @@ class SendFeedbackView(APIView):
                     items=openapi.Items(
                         type=openapi.TYPE_OBJECT,
                         properties={
+                            "item_id": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                description="ID do item de um questionário registrado, substitui question, subcontent e correct_answer",
+                            ),
                             "question": openapi.Schema(
                                 type=openapi.TYPE_STRING,
                                 description="Questão do questionário",
@@ -85,7 +130,7 @@ class SendFeedbackView(APIView):
                                 description="Respostas corretas para a questão",
                             ),
                         },
-                        required=["question", "answer", "subcontent", "correct_answer"],
+                        required=["answer"],
                     ),
                     description="Itens do questionário",
                 ),
@@ -106,10 +151,14 @@ class SendFeedbackView(APIView):
             status.HTTP_201_CREATED: openapi.Response(
                 "Questionário submetido com sucesso"
             ),
+            status.HTTP_202_ACCEPTED: openapi.Response(
+                "Questionário recebido, processamento assíncrono (?async=true)"
+            ),
             status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
             status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
         },
     )
+    @idempotent
     def post(self, request) -> Response:
         serializer = SendFeedbackSerializer(data=request.data)
 
@@ -117,45 +166,23 @@ class SendFeedbackView(APIView):
             data = serializer.validated_data
             try:
                 data = request.data
-                student_email: str = data.get("student_email")
-                teacher_email: str = data.get("teacher_email")
-                title: str = data.get("questionnaire_title")
-                content: str = data.get("questionnaire_content")
-                external_id: str = data.get("questionnaire_external_id")
-                items_data: list = data.get("items", [])
-                subject_name: str = data.get("subject_name")
-                subject_code: str = data.get("subject_code")
-                chat_id: str = data.get("chat_id")
-
-                student, _ = Student.objects.get_or_create(email=student_email)
-                teacher, _ = Teacher.objects.get_or_create(email=teacher_email)
 
-                chat_settings = ChatSettings.objects.get(id=chat_id)
+                if self._is_async_request(request):
+                    return self._enqueue_submission(data)
 
-                subject = self._save_subject(
-                    subject_code, subject_name, chat_settings, student, teacher
-                )
-
-                questionnaire, _ = Questionnaire.objects.get_or_create(
-                    external_id=external_id,
-                    defaults={
-                        "content": content,
-                        "title": title,
-                        "subject": subject,
-                    },
-                )
-                questionnaire.students.add(student)
-
-                answers = self._save_items_and_answers(
-                    questionnaire, items_data, student
-                )
+                (
+                    questionnaire,
+                    chat_settings,
+                    feedbacks,
+                    correct_count_answers,
+                ) = ingest_submission(data)
 
                 self._process_feedback(
-                    answers,
-                    content,
-                    student_email,
+                    feedbacks,
+                    correct_count_answers,
+                    data.get("questionnaire_content"),
+                    data.get("student_email"),
                     questionnaire,
-                    student,
                     chat_settings,
                 )
 
@@ -173,77 +200,35 @@ class SendFeedbackView(APIView):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def _save_subject(
-        self,
-        subject_code: str,
-        subject_name: str,
-        chat_settings: ChatSettings,
-        student: Student,
-        teacher: Teacher,
-    ) -> Subject:
-        default_attributes = {}
-
-        if subject_name:
-            default_attributes["name"] = subject_name
-        default_attributes["chat_settings"] = chat_settings
-
-        subject, _ = Subject.objects.get_or_create(
-            code=subject_code,
-            defaults=default_attributes,
+    def _is_async_request(self, request) -> bool:
+        return request.query_params.get("async", "").lower() in ("1", "true") or (
+            "respond-async" in request.headers.get("Prefer", "")
         )
 
-        subject.students.add(student)
-        subject.teachers.add(teacher)
-        subject.save()
-
-        return subject
-
-    def _save_items_and_answers(
-        self, questionnaire: Questionnaire, items_data: list, student: Student
-    ) -> list:
-        answers: list = []
-        for item_data in items_data:
-            item, _ = Item.objects.get_or_create(
-                questionnaire=questionnaire,
-                question=item_data.get("question"),
-                defaults={
-                    "subcontent": item_data.get("subcontent"),
-                    "correct_answer": item_data.get("correct_answer"),
-                },
-            )
-
-            answer_text = item_data.get("answer")
-            try:
-                if answer_text.startswith("[") and answer_text.endswith("]"):
-                    answer_text = answer_text[2:-2]
-                    answer_text = answer_text.replace("\\", "")
-                    answer_text = answer_text.replace('\\"', '"')
-                    answer_text = answer_text.split('","')
-            except Exception:
-                pass
-
-            answer, _ = Answer.objects.get_or_create(
-                item=item,
-                text=answer_text,
-            )
-            answer.students.add(student)
-            answers.append(answer)
+    def _enqueue_submission(self, data: dict) -> Response:
+        with transaction.atomic():
+            job = FeedbackJob.objects.create(payload=data)
+            transaction.on_commit(lambda: process_feedback_job.delay(job.id))
 
-        return answers
+        return Response(
+            {
+                "message": "Questionnaire received, processing feedback.",
+                "job_id": job.id,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     def _process_feedback(
         self,
-        answers: list,
+        feedbacks: List[Dict[str, Union[str, bool, int]]],
+        correct_count_answers: int,
         content: str,
         email: str,
         questionnaire: Questionnaire,
-        student: Student,
         chat_settings: ChatSettings,
     ) -> None:
-        try:
-            feedbacks, correct_count_answers = check_answers(answers)
-            self._save_result(feedbacks, questionnaire, student)
-            generate_formative_feedback.delay(
+        transaction.on_commit(
+            lambda: generate_formative_feedback.delay(
                 feedbacks,
                 content,
                 [email],
@@ -252,22 +237,541 @@ class SendFeedbackView(APIView):
                 chat_settings.id,
                 email,
             )
+        )
+
+    def _handle_error(self, message: str, reason: str) -> Response:
+        return Response(
+            {"error_message": message, "reason": reason},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class RegisterQuestionnaireView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Registrar ou versionar a definição de um questionário e obter os IDs dos seus itens",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "questionnaire_title": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Título do questionário"
+                ),
+                "questionnaire_content": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Conteúdo do questionário"
+                ),
+                "questionnaire_external_id": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="ID externo do questionário"
+                ),
+                "subject_code": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Código da disciplina"
+                ),
+                "subject_name": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Nome da disciplina"
+                ),
+                "teacher_email": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Email do professor"
+                ),
+                "chat_id": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="ID do chat"
+                ),
+                "items": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Items(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "question": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                description="Questão do questionário",
+                            ),
+                            "subcontent": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                description="Subconteúdo da questão",
+                            ),
+                            "correct_answer": openapi.Schema(
+                                type=openapi.TYPE_ARRAY,
+                                items=openapi.Items(type=openapi.TYPE_STRING),
+                                description="Respostas corretas para a questão",
+                            ),
+                        },
+                        required=["question", "subcontent", "correct_answer"],
+                    ),
+                    description="Itens do questionário",
+                ),
+            },
+            required=[
+                "questionnaire_title",
+                "questionnaire_content",
+                "questionnaire_external_id",
+                "subject_code",
+                "teacher_email",
+                "chat_id",
+                "items",
+            ],
+        ),
+        responses={
+            status.HTTP_201_CREATED: openapi.Response("Questionário registrado"),
+            status.HTTP_200_OK: openapi.Response("Questionário atualizado"),
+            status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    def post(self, request) -> Response:
+        serializer = RegisterQuestionnaireSerializer(data=request.data)
+
+        if serializer.is_valid():
+            try:
+                questionnaire, items, created = register_questionnaire(request.data)
+
+                return Response(
+                    {
+                        "questionnaire_id": questionnaire.id,
+                        "questionnaire_external_id": questionnaire.external_id,
+                        "version": questionnaire.version,
+                        "items": [
+                            {"item_id": item.id, "question": item.question}
+                            for item in items
+                        ],
+                    },
+                    status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+                )
+            except ObjectDoesNotExist as e:
+                return self._handle_error("Object does not exist.", str(e))
+            except Exception as e:
+                return self._handle_error("Error registering questionnaire.", str(e))
+        else:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def _handle_error(self, message: str, reason: str) -> Response:
+        return Response(
+            {"error_message": message, "reason": reason},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class QuestionnaireReportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    content_types = {
+        "csv": "text/csv",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "parquet": "application/vnd.apache.parquet",
+    }
+
+    @swagger_auto_schema(
+        operation_description="Baixar o relatório de um questionário",
+        manual_parameters=[
+            openapi.Parameter(
+                "report_format",
+                openapi.IN_QUERY,
+                description="Formato do relatório: csv, xlsx ou parquet",
+                type=openapi.TYPE_STRING,
+                enum=["csv", "xlsx", "parquet"],
+                default="csv",
+            ),
+            openapi.Parameter(
+                "table",
+                openapi.IN_QUERY,
+                description="Tabela do relatório para csv e parquet: performance ou statistics",
+                type=openapi.TYPE_STRING,
+                enum=["performance", "statistics"],
+                default="performance",
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response("Relatório do questionário"),
+            status.HTTP_304_NOT_MODIFIED: openapi.Response("Relatório não modificado"),
+            status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+            status.HTTP_404_NOT_FOUND: openapi.Response("Questionário não encontrado"),
+        },
+    )
+    def get(self, request, questionnaire_external_id: str):
+        serializer = QuestionnaireReportSerializer(data=request.query_params)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        report_format = serializer.validated_data["report_format"]
+        table = serializer.validated_data["table"]
+
+        try:
+            questionnaire = Questionnaire.objects.get(
+                external_id=questionnaire_external_id
+            )
+        except Questionnaire.DoesNotExist:
+            return Response(
+                {"error_message": "Questionnaire does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            etag = quote_etag(
+                f"{get_report_etag(questionnaire)}-{report_format}-{table}"
+            )
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+            if report_format == "csv":
+                rows = iter_report_table(questionnaire, table)
+                first_rows = list(islice(rows, 2))
+                response = StreamingHttpResponse(
+                    self._iter_csv(chain(first_rows, rows), questionnaire),
+                    content_type=self.content_types[report_format],
+                )
+            else:
+                cache_key = f"report:{etag}"
+                content = cache.get(cache_key)
+                if content is None:
+                    content = self._build_file(questionnaire, report_format, table)
+                    cache.set(cache_key, content, timeout=settings.REPORT_CACHE_TTL)
+
+                response = HttpResponse(
+                    content, content_type=self.content_types[report_format]
+                )
+
+            response["ETag"] = etag
+            response["Content-Disposition"] = (
+                f'attachment; filename="relatorio-{questionnaire.external_id}'
+                f'{"" if report_format == "xlsx" else f"-{table}"}.{report_format}"'
+            )
+
+            return response
+        except ImportError as e:
+            return self._handle_error("Report format is not available.", str(e))
         except Exception as e:
-            raise FeedbackGenerationException("Error generating feedback", str(e))
+            return self._handle_error("Error creating report.", str(e))
+
+    def _iter_csv(self, rows, questionnaire: Questionnaire):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        try:
+            for row in rows:
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        except Exception:
+            logger.exception(
+                "Aborting CSV report stream for questionnaire %s",
+                questionnaire.external_id,
+            )
+            raise
+
+    def _build_file(
+        self, questionnaire: Questionnaire, report_format: str, table: str
+    ) -> bytes:
+        if report_format == "parquet":
+            headers, *rows = iter_report_table(questionnaire, table)
+            output = io.BytesIO()
+            pd.DataFrame(rows, columns=headers).to_parquet(output, index=False)
+
+            return output.getvalue()
+
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as report_file:
+            write_report_workbook(questionnaire, report_file.name)
+
+            return report_file.read()
+
+    def _handle_error(self, message: str, reason: str) -> Response:
+        return Response(
+            {"error_message": message, "reason": reason},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class SubjectGradebookView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Baixar o boletim de uma disciplina com as notas dos alunos em todos os questionários e o domínio por subconteúdo",
+        responses={
+            status.HTTP_200_OK: openapi.Response("Boletim da disciplina"),
+            status.HTTP_304_NOT_MODIFIED: openapi.Response("Boletim não modificado"),
+            status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+            status.HTTP_404_NOT_FOUND: openapi.Response("Disciplina não encontrada"),
+        },
+    )
+    def get(self, request, subject_code: str):
+        try:
+            subject = Subject.objects.get(code=subject_code)
+        except Subject.DoesNotExist:
+            return Response(
+                {"error_message": "Subject does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            etag = quote_etag(f"{get_gradebook_etag(subject)}-xlsx")
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+            cache_key = f"gradebook:{etag}"
+            content = cache.get(cache_key)
+            if content is None:
+                with tempfile.NamedTemporaryFile(suffix=".xlsx") as gradebook_file:
+                    write_gradebook_workbook(subject, gradebook_file.name)
+                    content = gradebook_file.read()
+                cache.set(cache_key, content, timeout=settings.REPORT_CACHE_TTL)
+
+            response = HttpResponse(
+                content,
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+            response["ETag"] = etag
+            response["Content-Disposition"] = (
+                f'attachment; filename="boletim-{subject.code}.xlsx"'
+            )
+
+            return response
+        except Exception as e:
+            return self._handle_error("Error creating gradebook.", str(e))
 
-    def _save_result(
+    def _handle_error(self, message: str, reason: str) -> Response:
+        return Response(
+            {"error_message": message, "reason": reason},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class FeedbackJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Consultar o estágio de processamento de um questionário enviado de forma assíncrona",
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "Estágio do processamento", FeedbackJobSerializer
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response("Job não encontrado"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    def get(self, request, job_id) -> Response:
+        try:
+            job = FeedbackJob.objects.get(id=job_id)
+        except FeedbackJob.DoesNotExist:
+            return Response(
+                {"error_message": "Job does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(FeedbackJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class BulkSendFeedbackView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Submeter os questionários preenchidos de uma turma e gerar seus feedbacks",
+        manual_parameters=[idempotency_key_parameter],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "questionnaire_title": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Título do questionário"
+                ),
+                "questionnaire_content": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Conteúdo do questionário"
+                ),
+                "questionnaire_external_id": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="ID externo do questionário"
+                ),
+                "subject_code": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Código da disciplina"
+                ),
+                "subject_name": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Nome da disciplina"
+                ),
+                "teacher_email": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Email do professor"
+                ),
+                "chat_id": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="ID do chat"
+                ),
+                "submissions": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Items(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "student_email": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                description="Email do estudante",
+                            ),
+                            "items": openapi.Schema(
+                                type=openapi.TYPE_ARRAY,
+                                items=openapi.Items(type=openapi.TYPE_OBJECT),
+                                description="Itens respondidos pelo estudante, no mesmo formato do envio individual",
+                            ),
+                        },
+                        required=["student_email", "items"],
+                    ),
+                    description="Questionários preenchidos pelos estudantes",
+                ),
+            },
+            required=[
+                "questionnaire_title",
+                "questionnaire_content",
+                "questionnaire_external_id",
+                "subject_code",
+                "teacher_email",
+                "chat_id",
+                "submissions",
+            ],
+        ),
+        responses={
+            status.HTTP_201_CREATED: openapi.Response(
+                "Questionários submetidos com sucesso"
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    @idempotent
+    def post(self, request) -> Response:
+        serializer = BulkSendFeedbackSerializer(data=request.data)
+
+        if serializer.is_valid():
+            try:
+                data = request.data
+                teacher_email: str = data.get("teacher_email")
+                title: str = data.get("questionnaire_title")
+                content: str = data.get("questionnaire_content")
+                external_id: str = data.get("questionnaire_external_id")
+                subject_name: str = data.get("subject_name")
+                subject_code: str = data.get("subject_code")
+                chat_id: str = data.get("chat_id")
+                submissions_data: list = data.get("submissions")
+
+                with transaction.atomic():
+                    students_by_email = get_or_create_students(
+                        [
+                            submission_data.get("student_email")
+                            for submission_data in submissions_data
+                        ]
+                    )
+                    students = list(students_by_email.values())
+                    teacher, _ = Teacher.objects.get_or_create(email=teacher_email)
+
+                    chat_settings = ChatSettings.objects.get(id=chat_id)
+
+                    subject = save_subject(
+                        subject_code, subject_name, chat_settings, students, teacher
+                    )
+
+                    questionnaire, _ = Questionnaire.objects.get_or_create(
+                        external_id=external_id,
+                        defaults={
+                            "content": content,
+                            "title": title,
+                            "subject": subject,
+                        },
+                    )
+                    questionnaire.students.add(*students)
+
+                    items_by_key = save_items(
+                        questionnaire,
+                        [
+                            item_data
+                            for submission_data in submissions_data
+                            for item_data in submission_data.get("items", [])
+                        ],
+                    )
+                    submissions = [
+                        (
+                            students_by_email[submission_data.get("student_email")],
+                            submission_data.get("items", []),
+                        )
+                        for submission_data in submissions_data
+                    ]
+                    student_ids = [student.id for student in students]
+                    item_ids = [item.id for item in items_by_key.values()]
+                    previous_item_scores = get_item_scores(
+                        questionnaire, student_ids, item_ids
+                    )
+                    previous_scores = get_result_scores(questionnaire, student_ids)
+                    student_answers = save_answers(items_by_key, submissions)
+
+                    feedback_tasks = self._process_feedbacks(
+                        submissions,
+                        student_answers,
+                        content,
+                        questionnaire,
+                        chat_settings,
+                        (student_ids, item_ids, previous_item_scores, previous_scores),
+                    )
+
+                    transaction.on_commit(lambda: group(feedback_tasks).apply_async())
+
+                return Response(
+                    {
+                        "message": "Questionnaires submitted successfully, sending feedbacks.",
+                        "submissions": len(submissions),
+                    },
+                    status=status.HTTP_201_CREATED,
+                )
+
+            except ObjectDoesNotExist as e:
+                return self._handle_error("Object does not exist.", str(e))
+            except Exception as e:
+                return self._handle_error("Error processing request.", str(e))
+        else:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def _process_feedbacks(
         self,
-        feedbacks: List[Dict[str, Union[str, bool, int]]],
+        submissions: list,
+        student_answers: List[List[Answer]],
+        content: str,
         questionnaire: Questionnaire,
-        student: Student,
-    ) -> None:
-        total_score = 0
-        total_questions = 0
-        for feedback in feedbacks:
-            total_score += feedback["score"]
-            total_questions += 1
-        score = (total_score) * 100 / total_questions
-        Result.objects.create(score=score, questionnaire=questionnaire, student=student)
+        chat_settings: ChatSettings,
+        previous_statistics: tuple,
+    ) -> list:
+        feedback_tasks = []
+        student_scores = []
+        graded_answers = {}
+        answer_keys = {}
+
+        try:
+            for (student, _), answers in zip(submissions, student_answers):
+                feedbacks, correct_count_answers = grade_answers(answers, answer_keys)
+                student_scores.append((student, calculate_score(feedbacks), answers))
+                graded_answers.update({answer.id: answer for answer in answers})
+
+                feedback_tasks.append(
+                    generate_formative_feedback.s(
+                        feedbacks,
+                        content,
+                        [student.email],
+                        questionnaire.title,
+                        correct_count_answers,
+                        chat_settings.id,
+                        student.email,
+                    )
+                )
+
+            save_correct_answers(list(graded_answers.values()))
+            save_results(questionnaire, student_scores)
+            student_ids, item_ids, previous_item_scores, previous_scores = (
+                previous_statistics
+            )
+            update_statistics(
+                questionnaire,
+                previous_item_scores,
+                get_item_scores(questionnaire, student_ids, item_ids),
+                previous_scores,
+                {student.id: score for student, score, _ in student_scores},
+            )
+        except Exception as e:
+            raise FeedbackGenerationException("Error generating feedback", str(e))
+
+        return feedback_tasks
 
     def _handle_error(self, message: str, reason: str) -> Response:
         return Response(
@@ -281,6 +785,7 @@ class ResendFeedbackView(APIView):
 
     @swagger_auto_schema(
         operation_description="Reenviar um Feedback já criado",
+        manual_parameters=[idempotency_key_parameter],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -303,11 +808,21 @@ class ResendFeedbackView(APIView):
             ],
         ),
         responses={
-            status.HTTP_200_OK: openapi.Response("Resending feedback"),
+            status.HTTP_200_OK: openapi.Response(
+                "Resending feedback",
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "message": openapi.Schema(type=openapi.TYPE_STRING),
+                        "resend_job_id": openapi.Schema(type=openapi.TYPE_STRING),
+                    },
+                ),
+            ),
             status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
             status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
         },
     )
+    @idempotent
     def post(self, request) -> Response:
         serializer = ResendFeedbackSerializer(data=request.data)
 
@@ -321,21 +836,22 @@ class ResendFeedbackView(APIView):
                     "feedback_recipient"
                 )
 
-                questionnaire = Questionnaire.objects.get(
-                    external_id=questionnaire_external_id
-                )
+                questionnaire = Questionnaire.objects.select_related(
+                    "subject__chat_settings"
+                ).get(external_id=questionnaire_external_id)
 
                 recipient_emails = self._set_list_recipient_emails(
                     student_emails, questionnaire, feedback_recipient
                 )
 
-                self._build_feedback_context(
-                    student_emails, questionnaire, recipient_emails
+                resend_job = start_feedback_resend(
+                    questionnaire, student_emails, recipient_emails
                 )
 
                 return Response(
                     {
                         "message": "Resending feedback.",
+                        "resend_job_id": str(resend_job.id),
                     },
                     status=status.HTTP_200_OK,
                 )
@@ -363,38 +879,85 @@ class ResendFeedbackView(APIView):
 
         return recipient_emails
 
-    def _build_feedback_context(
-        self,
-        student_emails: List[str],
-        questionnaire: Questionnaire,
-        recipient_emails: Dict[str, List[str]],
-    ):
-        student_receive_email = len(recipient_emails.get("students", [])) > 0
-        recipient_emails_without_student = recipient_emails.get(
-            "teachers", []
-        ) + recipient_emails.get("others", [])
-        for student_email in student_emails:
-            answers = list(
-                Answer.objects.filter(
-                    item__questionnaire__id=questionnaire.id,
-                    students__email=student_email,
-                )
+    def _handle_error(self, message: str, reason: str) -> Response:
+        return Response(
+            {"error_message": message, "reason": reason},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class ResendJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Consultar o progresso de um reenvio de feedbacks, com o estágio de cada estudante",
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "Progresso do reenvio", ResendJobSerializer
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response("Reenvio não encontrado"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    def get(self, request, resend_job_id) -> Response:
+        try:
+            resend_job = (
+                ResendJob.objects.select_related("questionnaire")
+                .prefetch_related("feedback_jobs")
+                .get(id=resend_job_id)
+            )
+        except ResendJob.DoesNotExist:
+            return Response(
+                {"error_message": "Resend job does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
             )
-            if len(answers) > 0:
-                feedbacks, correct_count_answers = check_answers(answers)
-                generate_formative_feedback.delay(
-                    feedbacks,
-                    questionnaire.content,
-                    (
-                        recipient_emails_without_student + [student_email]
-                        if student_receive_email
-                        else recipient_emails_without_student
-                    ),
-                    questionnaire.title,
-                    correct_count_answers,
-                    questionnaire.subject.chat_settings.id,
-                    student_email,
-                )
+
+        return Response(ResendJobSerializer(resend_job).data, status=status.HTTP_200_OK)
+
+
+class RetryResendJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Reenviar apenas os feedbacks que falharam em um reenvio",
+        manual_parameters=[idempotency_key_parameter],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "Retrying failed feedbacks",
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "message": openapi.Schema(type=openapi.TYPE_STRING),
+                        "retried": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response("Requisição inválida"),
+            status.HTTP_404_NOT_FOUND: openapi.Response("Reenvio não encontrado"),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    @idempotent
+    def post(self, request, resend_job_id) -> Response:
+        try:
+            resend_job = ResendJob.objects.select_related(
+                "questionnaire__subject__chat_settings"
+            ).get(id=resend_job_id)
+        except ResendJob.DoesNotExist:
+            return Response(
+                {"error_message": "Resend job does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            retried = retry_feedback_resend(resend_job)
+        except Exception as e:
+            return self._handle_error("Error retrying failed feedbacks.", str(e))
+
+        return Response(
+            {"message": "Retrying failed feedbacks.", "retried": retried},
+            status=status.HTTP_200_OK,
+        )
 
     def _handle_error(self, message: str, reason: str) -> Response:
         return Response(
@@ -408,6 +971,7 @@ class SendReportView(APIView):
 
     @swagger_auto_schema(
         operation_description="Solicitar um relatório de um questionário",
+        manual_parameters=[idempotency_key_parameter],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -425,6 +989,7 @@ class SendReportView(APIView):
             status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
         },
     )
+    @idempotent
     def post(self, request) -> Response:
         serializer = SendReportSerializer(data=request.data)
 
@@ -442,14 +1007,7 @@ class SendReportView(APIView):
                     questionnaire.subject.teachers.values_list("email", flat=True)
                 )
 
-                report_file = self.generate_report(questionnaire)
-
-                subject = f"Relatório do Questionário {questionnaire.title}"
-                body = "Segue em anexo o relatório do questionário."
-
-                send_email_with_report.delay(
-                    subject, body, recipient_emails, report_file.getvalue()
-                )
+                send_questionnaire_report.delay(str(questionnaire.id), recipient_emails)
 
                 return Response(
                     {
@@ -462,73 +1020,34 @@ class SendReportView(APIView):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def generate_report(self, questionnaire):
-        students = questionnaire.students.all()
-        items = questionnaire.items.all()
-        results = Result.objects.filter(questionnaire=questionnaire)
-        answers = Answer.objects.filter(item__questionnaire=questionnaire)
-
-        data = []
-
-        for student in students:
-            student_data = {"Aluno": student.email}
-            for item in items:
-                student_answer = answers.filter(item=item, students=student).first()
-                if student_answer:
-                    student_data[item.question] = student_answer.correct
-                else:
-                    student_data[item.question] = 0.0
-
-            student_results = (
-                results.filter(student=student).order_by("-created_at").first()
-            )
-            student_score = student_results.score if student_results else 0
-            student_data["Pontuação"] = student_score
-
-            data.append(student_data)
-
-        df = pd.DataFrame(data)
-
-        question_stats_data = []
-        for item in items:
-            question = item.question
-            correct_count = (df[question] == 1.0).sum()
-            incorrect_count = (df[question] == 0.0).sum()
-            parcial_correct_count = (
-                df[question].between(0.0, 1.0, inclusive="neither").sum()
-            )
-            total_count = len(df)
-            correct_percentage = (correct_count / total_count) * 100
-            incorrect_percentage = (incorrect_count / total_count) * 100
-            parcial_correct_percentage = (parcial_correct_count / total_count) * 100
-            question_stats_data.append(
-                {
-                    "Questão": question,
-                    "Corretas": correct_count,
-                    "Parcialmente Corretas": parcial_correct_count,
-                    "Incorretas": incorrect_count,
-                    "Total": total_count,
-                    "Corretas %": correct_percentage,
-                    "Parcialmente Corretas %": parcial_correct_percentage,
-                    "Incorretas %": incorrect_percentage,
-                }
-            )
-
-        question_stats = pd.DataFrame(question_stats_data)
-
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Desempenho dos Alunos")
-            question_stats.to_excel(
-                writer, index=False, sheet_name="Estatísticas das Questões"
-            )
-
-        output.seek(0)
-
-        return output
-
     def _handle_error(self, message: str, reason: str) -> Response:
         return Response(
             {"error_message": message, "reason": reason},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Consultar as métricas de acerto dos caches de feedbacks e de PDFs",
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "Métricas dos caches",
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "feedback": openapi.Schema(type=openapi.TYPE_OBJECT),
+                        "pdf": openapi.Schema(type=openapi.TYPE_OBJECT),
+                    },
+                ),
+            ),
+            status.HTTP_401_UNAUTHORIZED: openapi.Response("Não autorizado"),
+        },
+    )
+    def get(self, request) -> Response:
+        return Response(
+            {"feedback": feedback_cache.stats(), "pdf": pdf_cache.stats()},
+            status=status.HTTP_200_OK,
+        )
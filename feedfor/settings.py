@@ -143,11 +143,68 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = True
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 30))
+EMAIL_CONNECTION_MAX_IDLE = float(os.getenv("EMAIL_CONNECTION_MAX_IDLE", 60))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+EMAIL_RETRY_BACKOFF = float(os.getenv("EMAIL_RETRY_BACKOFF", 1))
+EMAIL_MESSAGES_PER_MINUTE = int(os.getenv("EMAIL_MESSAGES_PER_MINUTE", 30))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+CELERY_BROKER_URL = f"{REDIS_URL}/0"
+CELERY_RESULT_BACKEND = f"{REDIS_URL}/0"
+CELERY_RENDER_QUEUE = os.getenv("CELERY_RENDER_QUEUE", "render")
+RENDER_WORKER = os.getenv("RENDER_WORKER", "false").lower() == "true"
+CELERY_TASK_ROUTES = {
+    "core.tasks.send_formative_feedback_email": {"queue": CELERY_RENDER_QUEUE},
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"{REDIS_URL}/1",
+    }
+}
 
-CELERY_BROKER_URL = "redis://redis:6379/0"
-CELERY_RESULT_BACKEND = "redis://redis:6379/0"
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", 60 * 5))
+
+RATE_LIMIT_REDIS_URL = f"{REDIS_URL}/2"
+RATE_LIMIT_SAFETY_FACTOR = float(os.getenv("RATE_LIMIT_SAFETY_FACTOR", 0.9))
+
+FEEDBACK_CACHE_TTL = int(os.getenv("FEEDBACK_CACHE_TTL", 60 * 60 * 24 * 30))
+FEEDBACK_CACHE_LOCAL_MAX_ENTRIES = int(
+    os.getenv("FEEDBACK_CACHE_LOCAL_MAX_ENTRIES", 1024)
+)
+REGISTERED_ITEMS_CACHE_TTL = int(os.getenv("REGISTERED_ITEMS_CACHE_TTL", 60 * 10))
+REGISTERED_ITEMS_CACHE_MAX_ENTRIES = int(
+    os.getenv("REGISTERED_ITEMS_CACHE_MAX_ENTRIES", 256)
+)
+
+FEEDBACK_STYLESHEET = os.path.join(BASE_DIR, "templates", "feedback_template.css")
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(BASE_DIR, "pdf_cache"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(BASE_DIR, "reports"))
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 60 * 60))
+
+FEEDBACK_CLUSTER_THRESHOLD = float(os.getenv("FEEDBACK_CLUSTER_THRESHOLD", 0.8))
+FEEDBACK_GENERATION_MAX_RETRIES = int(os.getenv("FEEDBACK_GENERATION_MAX_RETRIES", 3))
+FEEDBACK_GENERATION_RETRY_BACKOFF = int(
+    os.getenv("FEEDBACK_GENERATION_RETRY_BACKOFF", 30)
+)
+FEEDBACK_GENERATION_RETRY_BACKOFF_MAX = int(
+    os.getenv("FEEDBACK_GENERATION_RETRY_BACKOFF_MAX", 60 * 10)
+)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 60))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 5))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", 1))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", 60))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 20))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 60))
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -186,6 +243,23 @@ MODEL_CHOICES = [
     "gpt-4-turbo-2024-05-13",
 ]
 
+MODEL_MAX_OUTPUT_TOKENS = {
+    "gpt-4": 8192,
+    "gpt-4-0613": 8192,
+}
+DEFAULT_MODEL_MAX_OUTPUT_TOKENS = 4096
+JSON_MODE_MODELS = [
+    "gpt-4o",
+    "gpt-3.5-turbo",
+    "gpt-4-turbo",
+    "gpt-3.5-turbo-0125",
+    "gpt-4-0125-preview",
+    "gpt-4-1106-preview",
+    "gpt-4-turbo-2024-04-09",
+    "gpt-4-turbo-preview",
+    "gpt-4-turbo-2024-05-13",
+]
+
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
         "api_key": {"type": "apiKey", "in": "header", "name": "Authorization"}